@@ -1,44 +1,114 @@
 import os
+from dataclasses import dataclass
 from dotenv import load_dotenv
 
 load_dotenv()
 
-BOT_TOKEN: str = os.getenv("BOT_TOKEN", "")
-ADMIN_ID: int = int(os.getenv("ADMIN_ID", "0"))
-ADMIN_USERNAME: str = os.getenv("ADMIN_USERNAME", "")
-CHANNEL_URL: str = os.getenv("CHANNEL_URL", "")
-
-# Admin IDs for statistics access (comma-separated)
-ADMIN_IDS_STR: str = os.getenv("ADMIN_IDS", "")
-ADMIN_IDS: list[int] = [int(id.strip()) for id in ADMIN_IDS_STR.split(",") if id.strip().isdigit()]
-
-# Notification settings
-DEFAULT_NOTIFY_NEW_USERS: bool = os.getenv("DEFAULT_NOTIFY_NEW_USERS", "true").lower() == "true"
-DEFAULT_NOTIFY_ORDERS: bool = os.getenv("DEFAULT_NOTIFY_ORDERS", "true").lower() == "true"
-DEFAULT_NOTIFY_ABANDONED: bool = os.getenv("DEFAULT_NOTIFY_ABANDONED", "true").lower() == "true"
-DEFAULT_ABANDONED_THRESHOLD: int = int(os.getenv("DEFAULT_ABANDONED_THRESHOLD", "10"))
-
-# Statistics settings
-STATS_CACHE_TTL: int = int(os.getenv("STATS_CACHE_TTL", "300"))  # 5 minutes
-STATS_EXPORT_DIR: str = os.getenv("STATS_EXPORT_DIR", "./exports")
-
-# Reminder settings
-REMINDER_DELAY_MINUTES: int = int(os.getenv("REMINDER_DELAY_MINUTES", "15"))
-REMINDER_ENABLED: bool = os.getenv("REMINDER_ENABLED", "true").lower() == "true"
-REMINDER_CHECK_INTERVAL_MINUTES: int = int(os.getenv("REMINDER_CHECK_INTERVAL_MINUTES", "1"))
-
-# Manager and group links
-MANAGER_LINK: str = f"https://t.me/{ADMIN_USERNAME}"
-SHOW_GROUP_BUTTON: bool = os.getenv("SHOW_GROUP_BUTTON", "false").lower() == "true"
-
-PG_USER: str = os.getenv("PG_USER", "postgres")
-PG_PASS: str = os.getenv("PG_PASS", "")
-PG_HOST: str = os.getenv("PG_HOST", "localhost")
-PG_PORT: int = int(os.getenv("PG_PORT", "5432"))
-PG_NAME: str = os.getenv("PG_NAME", "valubot")
-
-# DSN without password if not set
-if PG_PASS:
-    PG_DSN: str = f"postgresql://{PG_USER}:{PG_PASS}@{PG_HOST}:{PG_PORT}/{PG_NAME}"
-else:
-    PG_DSN: str = f"postgresql://{PG_USER}@{PG_HOST}:{PG_PORT}/{PG_NAME}"
+__all__ = ["Settings", "settings"]
+
+
+def _env_bool(key: str, default: str) -> bool:
+    return os.getenv(key, default).lower() == "true"
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Application settings, parsed from the environment once at import."""
+    BOT_TOKEN: str
+    ADMIN_ID: int
+    ADMIN_USERNAME: str
+    CHANNEL_URL: str
+
+    # Admin IDs for statistics access; a frozenset so membership checks are O(1)
+    ADMIN_IDS: frozenset[int]
+
+    # Notification settings
+    DEFAULT_NOTIFY_NEW_USERS: bool
+    DEFAULT_NOTIFY_ORDERS: bool
+    DEFAULT_NOTIFY_ABANDONED: bool
+    DEFAULT_ABANDONED_THRESHOLD: int
+
+    # Statistics settings
+    STATS_CACHE_TTL: int
+    STATS_EXPORT_DIR: str
+
+    # In-process cache settings
+    LANG_CACHE_SIZE: int
+    LANG_CACHE_TTL: int
+    VALUATION_CACHE_SIZE: int
+
+    # Reminder settings
+    REMINDER_DELAY_MINUTES: int
+    REMINDER_ENABLED: bool
+    REMINDER_CHECK_INTERVAL_MINUTES: int
+
+    # Manager and group links
+    MANAGER_LINK: str
+    SHOW_GROUP_BUTTON: bool
+
+    PG_USER: str
+    PG_PASS: str
+    PG_HOST: str
+    PG_PORT: int
+    PG_NAME: str
+    PG_DSN: str
+
+    # Connection pool settings
+    PG_POOL_MIN: int
+    PG_POOL_MAX: int
+    PG_CMD_TIMEOUT: float
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Build settings from environment variables."""
+        admin_username = os.getenv("ADMIN_USERNAME", "")
+
+        # Admin IDs (comma-separated)
+        admin_ids_str = os.getenv("ADMIN_IDS", "")
+        admin_ids = frozenset(int(id.strip()) for id in admin_ids_str.split(",") if id.strip().isdigit())
+
+        pg_user = os.getenv("PG_USER", "postgres")
+        pg_pass = os.getenv("PG_PASS", "")
+        pg_host = os.getenv("PG_HOST", "localhost")
+        pg_port = int(os.getenv("PG_PORT", "5432"))
+        pg_name = os.getenv("PG_NAME", "valubot")
+
+        # DSN without password if not set
+        if pg_pass:
+            pg_dsn = f"postgresql://{pg_user}:{pg_pass}@{pg_host}:{pg_port}/{pg_name}"
+        else:
+            pg_dsn = f"postgresql://{pg_user}@{pg_host}:{pg_port}/{pg_name}"
+
+        return cls(
+            BOT_TOKEN=os.getenv("BOT_TOKEN", ""),
+            ADMIN_ID=int(os.getenv("ADMIN_ID", "0")),
+            ADMIN_USERNAME=admin_username,
+            CHANNEL_URL=os.getenv("CHANNEL_URL", ""),
+            ADMIN_IDS=admin_ids,
+            DEFAULT_NOTIFY_NEW_USERS=_env_bool("DEFAULT_NOTIFY_NEW_USERS", "true"),
+            DEFAULT_NOTIFY_ORDERS=_env_bool("DEFAULT_NOTIFY_ORDERS", "true"),
+            DEFAULT_NOTIFY_ABANDONED=_env_bool("DEFAULT_NOTIFY_ABANDONED", "true"),
+            DEFAULT_ABANDONED_THRESHOLD=int(os.getenv("DEFAULT_ABANDONED_THRESHOLD", "10")),
+            STATS_CACHE_TTL=int(os.getenv("STATS_CACHE_TTL", "300")),  # 5 minutes
+            STATS_EXPORT_DIR=os.getenv("STATS_EXPORT_DIR", "./exports"),
+            LANG_CACHE_SIZE=int(os.getenv("LANG_CACHE_SIZE", "10000")),
+            LANG_CACHE_TTL=int(os.getenv("LANG_CACHE_TTL", "600")),  # 10 minutes
+            VALUATION_CACHE_SIZE=int(os.getenv("VALUATION_CACHE_SIZE", "20000")),
+            REMINDER_DELAY_MINUTES=int(os.getenv("REMINDER_DELAY_MINUTES", "15")),
+            REMINDER_ENABLED=_env_bool("REMINDER_ENABLED", "true"),
+            REMINDER_CHECK_INTERVAL_MINUTES=int(os.getenv("REMINDER_CHECK_INTERVAL_MINUTES", "1")),
+            MANAGER_LINK=f"https://t.me/{admin_username}",
+            SHOW_GROUP_BUTTON=_env_bool("SHOW_GROUP_BUTTON", "false"),
+            PG_USER=pg_user,
+            PG_PASS=pg_pass,
+            PG_HOST=pg_host,
+            PG_PORT=pg_port,
+            PG_NAME=pg_name,
+            PG_DSN=pg_dsn,
+            PG_POOL_MIN=int(os.getenv("PG_POOL_MIN", "5")),
+            PG_POOL_MAX=int(os.getenv("PG_POOL_MAX", "25")),
+            PG_CMD_TIMEOUT=float(os.getenv("PG_CMD_TIMEOUT", "30")),
+        )
+
+
+settings = Settings.from_env()
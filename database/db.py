@@ -1,256 +1,678 @@
+import asyncio
+import logging
 import asyncpg
-from typing import Optional
+import orjson
+from cachetools import LRUCache, TTLCache
+from typing import AsyncIterator, Callable, Optional, Sequence
 from datetime import datetime, date, timedelta
-import json
+from functools import lru_cache
 
-from config import PG_DSN
+from config import settings
+from database.models import DAILY_STATS_COLUMNS
+
+__all__ = ["DB_ERRORS", "Database", "db"]
+
+logger = logging.getLogger(__name__)
+
+# Errors a query can raise at runtime: server errors, driver misuse, dropped connections, timeouts
+DB_ERRORS = (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError)
+
+# Seconds between background pings of idle pool connections
+HEALTH_CHECK_INTERVAL = 30
+
+# Seconds between refreshes of today's row in daily_stats_cache
+STATS_REFRESH_INTERVAL = 60
+
+# Seconds between checks that upcoming monthly events partitions exist
+PARTITION_CHECK_INTERVAL = 24 * 60 * 60
+
+# Queued events are written with COPY once this many pile up or this many seconds pass
+EVENT_FLUSH_BATCH = 1000
+EVENT_FLUSH_INTERVAL = 0.05
+# A failed batch is retried this many times, RETRY_DELAY * attempt seconds apart, before it is dropped
+EVENT_FLUSH_RETRIES = 5
+EVENT_FLUSH_RETRY_DELAY = 1.0
+EVENT_COLUMNS = ("user_id", "event_type", "metadata", "timestamp")
+
+
+# Bump whenever DDL_SCRIPT changes so existing databases get migrated on startup
+SCHEMA_VERSION = "9"
+
+# Idempotent schema and migrations, sent to the server as a single script
+DDL_SCRIPT = """
+    -- Users table with extended fields
+    CREATE TABLE IF NOT EXISTS users (
+        user_id BIGINT PRIMARY KEY,
+        language VARCHAR(5) DEFAULT 'en',
+        join_date TIMESTAMP DEFAULT NOW(),
+        first_seen TIMESTAMP DEFAULT NOW(),
+        last_activity TIMESTAMP DEFAULT NOW(),
+        username VARCHAR(255),
+        is_admin BOOLEAN DEFAULT FALSE
+    );
+
+    -- Add new columns if they don't exist (migration)
+    DO $$ 
+    BEGIN
+        BEGIN
+            ALTER TABLE users ADD COLUMN first_seen TIMESTAMP DEFAULT NOW();
+        EXCEPTION
+            WHEN duplicate_column THEN NULL;
+        END;
+        BEGIN
+            ALTER TABLE users ADD COLUMN last_activity TIMESTAMP DEFAULT NOW();
+        EXCEPTION
+            WHEN duplicate_column THEN NULL;
+        END;
+        BEGIN
+            ALTER TABLE users ADD COLUMN username VARCHAR(255);
+        EXCEPTION
+            WHEN duplicate_column THEN NULL;
+        END;
+        BEGIN
+            ALTER TABLE users ADD COLUMN is_admin BOOLEAN DEFAULT FALSE;
+        EXCEPTION
+            WHEN duplicate_column THEN NULL;
+        END;
+        BEGIN
+            ALTER TABLE users ADD COLUMN is_bot_blocked BOOLEAN DEFAULT FALSE;
+        EXCEPTION
+            WHEN duplicate_column THEN NULL;
+        END;
+        BEGIN
+            ALTER TABLE users ADD COLUMN last_valuation_date TIMESTAMP;
+        EXCEPTION
+            WHEN duplicate_column THEN NULL;
+        END;
+        BEGIN
+            ALTER TABLE users ADD COLUMN contacted_manager BOOLEAN DEFAULT FALSE;
+        EXCEPTION
+            WHEN duplicate_column THEN NULL;
+        END;
+        BEGIN
+            ALTER TABLE users ADD COLUMN reminder_sent BOOLEAN DEFAULT FALSE;
+        EXCEPTION
+            WHEN duplicate_column THEN NULL;
+        END;
+        BEGIN
+            ALTER TABLE users ADD COLUMN latest_valuation_id BIGINT;
+        EXCEPTION
+            WHEN duplicate_column THEN NULL;
+        END;
+    END $$;
+
+    -- Lets get_language answer from the index alone
+    CREATE INDEX IF NOT EXISTS idx_users_lang ON users (user_id) INCLUDE (language);
+
+    -- Matches the ORDER BY of the admin users list so pages come off the index
+    CREATE INDEX IF NOT EXISTS idx_users_activity
+        ON users (((username IS NOT NULL AND username <> '')) DESC, last_activity DESC)
+        INCLUDE (user_id, first_seen);
+
+    CREATE TABLE IF NOT EXISTS username_valuations (
+        username VARCHAR(33) PRIMARY KEY,
+        structure VARCHAR(50),
+        category VARCHAR(50),
+        rarity VARCHAR(50),
+        demand VARCHAR(50),
+        score VARCHAR(10),
+        branding VARCHAR(50),
+        price_range INT4RANGE,
+        created_at TIMESTAMP DEFAULT NOW()
+    );
+
+    -- Migrate price_low/price_high pair into a single inclusive range
+    DO $$
+    BEGIN
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'username_valuations' AND column_name = 'price_low'
+        ) THEN
+            ALTER TABLE username_valuations ADD COLUMN IF NOT EXISTS price_range INT4RANGE;
+            UPDATE username_valuations SET price_range = int4range(price_low, price_high, '[]');
+            ALTER TABLE username_valuations DROP COLUMN price_low, DROP COLUMN price_high;
+        END IF;
+    END $$;
+    CREATE INDEX IF NOT EXISTS idx_username_valuations_price ON username_valuations USING GIST (price_range);
+
+    -- Fixed-size hash of the username for lookups; the PK stays authoritative
+    ALTER TABLE username_valuations ADD COLUMN IF NOT EXISTS username_hash BIGINT
+        GENERATED ALWAYS AS (hashtextextended(username, 0)) STORED;
+    CREATE INDEX IF NOT EXISTS idx_username_valuations_hash ON username_valuations USING HASH (username_hash);
+
+    -- Move a pre-partitioning events table aside so it can be copied into the partitioned one
+    DO $$
+    BEGIN
+        IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('events')) = 'r' THEN
+            ALTER TABLE events RENAME TO events_unpartitioned;
+            ALTER TABLE events_unpartitioned RENAME CONSTRAINT events_pkey TO events_unpartitioned_pkey;
+            DROP INDEX IF EXISTS idx_events_user_id, idx_events_event_type,
+                idx_events_timestamp, idx_events_user_event;
+        END IF;
+    END $$;
+
+    -- Events table for logging, partitioned by month so recent data stays on small indexes
+    CREATE SEQUENCE IF NOT EXISTS events_id_seq;
+    CREATE TABLE IF NOT EXISTS events (
+        id BIGINT NOT NULL DEFAULT nextval('events_id_seq'),
+        user_id BIGINT NOT NULL,
+        event_type VARCHAR(50) NOT NULL,
+        timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
+        metadata JSONB DEFAULT '{}'::jsonb,
+        PRIMARY KEY (id, timestamp)
+    ) PARTITION BY RANGE (timestamp);
+    ALTER SEQUENCE events_id_seq OWNED BY events.id;
+    -- Catches timestamps outside every monthly partition (clock drift), so a COPY batch can't fail on them
+    CREATE TABLE IF NOT EXISTS events_default PARTITION OF events DEFAULT;
+
+    -- Create monthly events partitions covering start_month..end_month, skipping existing ones;
+    -- rows already caught by events_default for a new month are moved into its partition
+    CREATE OR REPLACE FUNCTION ensure_events_partitions(start_month DATE, end_month DATE)
+    RETURNS void LANGUAGE plpgsql AS $$
+    DECLARE
+        m DATE := date_trunc('month', start_month)::date;
+        part TEXT;
+    BEGIN
+        WHILE m <= end_month LOOP
+            part := 'events_' || to_char(m, 'YYYY_MM');
+            IF to_regclass(part) IS NULL THEN
+                EXECUTE format('CREATE TABLE %I (LIKE events INCLUDING DEFAULTS)', part);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM events_default WHERE timestamp >= %L AND timestamp < %L RETURNING *)'
+                    ' INSERT INTO %I SELECT * FROM moved',
+                    m, (m + INTERVAL '1 month')::date, part
+                );
+                EXECUTE format(
+                    'ALTER TABLE events ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    part, m, (m + INTERVAL '1 month')::date
+                );
+            END IF;
+            m := (m + INTERVAL '1 month')::date;
+        END LOOP;
+    END $$;
+    SELECT ensure_events_partitions(CURRENT_DATE, (CURRENT_DATE + INTERVAL '3 months')::date);
+
+    DO $$
+    BEGIN
+        IF to_regclass('events_unpartitioned') IS NOT NULL THEN
+            PERFORM ensure_events_partitions(
+                COALESCE(MIN(timestamp), NOW())::date,
+                GREATEST(COALESCE(MAX(timestamp), NOW()), NOW())::date
+            ) FROM events_unpartitioned;
+            INSERT INTO events (id, user_id, event_type, timestamp, metadata)
+            SELECT id, user_id, event_type, COALESCE(timestamp, NOW()), metadata
+            FROM events_unpartitioned;
+            DROP TABLE events_unpartitioned;
+        END IF;
+    END $$;
+
+    -- Create indexes for events table
+    CREATE INDEX IF NOT EXISTS idx_events_user_id ON events(user_id);
+    -- (event_type, timestamp) also serves event_type-only lookups, so it replaces idx_events_event_type
+    CREATE INDEX IF NOT EXISTS idx_events_type_timestamp ON events(event_type, timestamp);
+    DROP INDEX IF EXISTS idx_events_event_type;
+    CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp);
+    CREATE INDEX IF NOT EXISTS idx_events_user_event ON events(user_id, event_type);
+
+    -- Admin notification settings table
+    CREATE TABLE IF NOT EXISTS admin_notification_settings (
+        admin_id BIGINT PRIMARY KEY,
+        notify_new_users BOOLEAN DEFAULT TRUE,
+        notify_orders BOOLEAN DEFAULT TRUE,
+        notify_abandoned_checkouts BOOLEAN DEFAULT TRUE,
+        abandoned_threshold INTEGER DEFAULT 10,
+        updated_at TIMESTAMP DEFAULT NOW()
+    );
+
+    -- Daily stats cache table
+    CREATE TABLE IF NOT EXISTS daily_stats_cache (
+        stat_date DATE PRIMARY KEY,
+        total_users INTEGER DEFAULT 0,
+        new_users INTEGER DEFAULT 0,
+        bot_restarts INTEGER DEFAULT 0,
+        group_visits INTEGER DEFAULT 0,
+        manager_contacts INTEGER DEFAULT 0,
+        nickname_checks INTEGER DEFAULT 0,
+        checkout_starts INTEGER DEFAULT 0,
+        successful_orders INTEGER DEFAULT 0,
+        abandoned_checkouts INTEGER DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT NOW()
+    );
+    ALTER TABLE daily_stats_cache ADD COLUMN IF NOT EXISTS first_starts INTEGER DEFAULT 0;
+    ALTER TABLE daily_stats_cache ADD COLUMN IF NOT EXISTS exits_without_action INTEGER DEFAULT 0;
+
+    -- Valuations table for tracking user evaluations
+    CREATE TABLE IF NOT EXISTS valuations (
+        id BIGSERIAL PRIMARY KEY,
+        user_id BIGINT NOT NULL,
+        username_checked VARCHAR(255) NOT NULL,
+        estimated_price VARCHAR(100),
+        valuation_date TIMESTAMP DEFAULT NOW(),
+        manager_contacted BOOLEAN DEFAULT FALSE,
+        reminder_sent BOOLEAN DEFAULT FALSE,
+        reminder_sent_at TIMESTAMP
+    );
+
+    -- Create indexes for valuations table
+    CREATE INDEX IF NOT EXISTS idx_valuations_user_id ON valuations(user_id);
+    CREATE INDEX IF NOT EXISTS idx_valuations_date ON valuations(valuation_date);
+    CREATE INDEX IF NOT EXISTS idx_valuations_reminder ON valuations(reminder_sent, manager_contacted);
+    CREATE INDEX IF NOT EXISTS idx_valuations_pending ON valuations(user_id, valuation_date DESC)
+        WHERE reminder_sent = FALSE AND manager_contacted = FALSE;
+
+    -- Backfill latest_valuation_id for users created before the column existed
+    UPDATE users u SET latest_valuation_id = v.id
+    FROM (
+        SELECT DISTINCT ON (user_id) user_id, id
+        FROM valuations
+        ORDER BY user_id, valuation_date DESC, id DESC
+    ) v
+    WHERE u.user_id = v.user_id AND u.latest_valuation_id IS NULL;
+
+    -- System settings table for configurable parameters
+    CREATE TABLE IF NOT EXISTS system_settings (
+        setting_key VARCHAR(100) PRIMARY KEY,
+        setting_value TEXT NOT NULL,
+        setting_type VARCHAR(20) DEFAULT 'string',
+        description TEXT,
+        updated_at TIMESTAMP DEFAULT NOW(),
+        updated_by BIGINT
+    );
+
+    -- Initialize default settings
+    INSERT INTO system_settings (setting_key, setting_value, setting_type, description)
+    VALUES 
+        ('reminder_check_interval', '1', 'int', 'Interval in minutes to check for pending reminders'),
+        ('reminder_enabled', 'true', 'bool', 'Enable/disable reminder system'),
+        ('reminder_delay_minutes', '15', 'int', 'Minutes to wait before sending reminder after valuation')
+    ON CONFLICT (setting_key) DO NOTHING;
+"""
+
+# Hot-path statements; fixed texts, so the statement cache prepares each once per connection
+SQL_ADD_USER = "INSERT INTO users (user_id) VALUES ($1) ON CONFLICT DO NOTHING RETURNING user_id"
+SQL_SET_LANGUAGE = "UPDATE users SET language = $2 WHERE user_id = $1"
+SQL_UPSERT_USER = """
+    INSERT INTO users (user_id, language) VALUES ($1, COALESCE($2, 'en'))
+    ON CONFLICT (user_id) DO UPDATE SET language = COALESCE($2, users.language)
+    RETURNING language
+"""
+SQL_GET_LANGUAGE = "SELECT language FROM users WHERE user_id = $1"
+SQL_UPDATE_USER_INFO = """
+    UPDATE users SET username = COALESCE(NULLIF($2, ''), username), last_activity = NOW()
+    WHERE user_id = $1
+"""
+SQL_TOUCH_USERS = """
+    UPDATE users SET last_activity = b.ts, username = COALESCE(NULLIF(b.username, ''), users.username)
+    FROM unnest($1::bigint[], $2::timestamp[], $3::varchar[]) AS b(user_id, ts, username)
+    WHERE users.user_id = b.user_id
+"""
+SQL_GET_VALUATION = """
+    SELECT structure, category, rarity, demand, score, branding,
+           lower(price_range) AS price_low, upper(price_range) - 1 AS price_high
+    FROM username_valuations
+    WHERE username_hash = hashtextextended($1, 0) AND username = $1
+"""
+SQL_SAVE_VALUATION = """
+    INSERT INTO username_valuations 
+    (username, structure, category, rarity, demand, score, branding, price_range)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, int4range($8, $9, '[]'))
+    ON CONFLICT (username) DO NOTHING
+    RETURNING username
+"""
+
+# One fixed upsert per toggleable column: flips the stored flag, or inserts defaults
+# with that flag already flipped, and returns the resulting settings row
+_NOTIFY_COLUMNS = "admin_id, notify_new_users, notify_orders, notify_abandoned_checkouts, abandoned_threshold"
+SQL_TOGGLE_NOTIFICATION = {
+    column: (
+        "INSERT INTO admin_notification_settings (" + _NOTIFY_COLUMNS + ")"
+        " VALUES ($1, $2, $3, $4, $5)"
+        f" ON CONFLICT (admin_id) DO UPDATE SET {column} = NOT admin_notification_settings.{column},"
+        " updated_at = NOW()"
+        " RETURNING " + _NOTIFY_COLUMNS
+    )
+    for column in ("notify_new_users", "notify_orders", "notify_abandoned_checkouts")
+}
+SQL_GET_NOTIFICATION_SETTINGS = (
+    "SELECT " + _NOTIFY_COLUMNS + " FROM admin_notification_settings WHERE admin_id = $1"
+)
+
+# Recomputes one day of daily_stats_cache from users and events in a single statement
+_DAILY_STATS_SELECT = ", ".join(
+    ["stat_date", "total_users", "new_users", *DAILY_STATS_COLUMNS.values()]
+)
+SQL_REFRESH_DAILY_STATS = (
+    "INSERT INTO daily_stats_cache (" + _DAILY_STATS_SELECT + ", updated_at)"
+    " SELECT $1::date,"
+    " (SELECT COUNT(*) FROM users WHERE first_seen < $1::date + 1),"
+    " (SELECT COUNT(*) FROM users WHERE first_seen >= $1::date AND first_seen < $1::date + 1), "
+    + ", ".join(
+        f"COUNT(*) FILTER (WHERE event_type = '{event_type}')"
+        for event_type in DAILY_STATS_COLUMNS
+    )
+    + ", NOW() FROM events WHERE timestamp >= $1::date AND timestamp < $1::date + 1"
+    " ON CONFLICT (stat_date) DO UPDATE SET "
+    + ", ".join(
+        f"{column} = EXCLUDED.{column}"
+        for column in ["total_users", "new_users", *DAILY_STATS_COLUMNS.values(), "updated_at"]
+    )
+    + " RETURNING " + _DAILY_STATS_SELECT
+)
+SQL_GET_DAILY_STATS = (
+    "SELECT " + _DAILY_STATS_SELECT + " FROM daily_stats_cache WHERE stat_date = $1"
+)
+
+
+# Events filters use one fixed SQL text per query, with NULL meaning "no filter",
+# so every filter combination shares the same cached statement and plan
+_EVENT_COLUMNS = "id, user_id, event_type, timestamp, metadata"
+_EVENTS_WHERE = """
+    WHERE ($1::bigint IS NULL OR user_id = $1)
+    AND ($2::varchar IS NULL OR event_type = $2)
+    AND ($3::timestamp IS NULL OR timestamp >= $3)
+    AND ($4::timestamp IS NULL OR timestamp <= $4)
+"""
+SQL_GET_EVENTS = (
+    "SELECT " + _EVENT_COLUMNS + " FROM events" + _EVENTS_WHERE + "ORDER BY timestamp DESC LIMIT $5 OFFSET $6"
+)
+SQL_COUNT_EVENTS = "SELECT COUNT(*) FROM events" + _EVENTS_WHERE
+SQL_COUNT_EVENTS_BY_TYPE = """
+    SELECT event_type, COUNT(*) FROM events
+    WHERE event_type = ANY($1::varchar[]) AND timestamp >= $2 AND timestamp < $3
+    GROUP BY event_type
+"""
+
+
+# Cache sentinel distinguishing "not cached" from a cached None
+_MISSING = object()
+
+
+@lru_cache(maxsize=4096)
+def _norm_username(username: str) -> str:
+    """Normalize username to the form stored in username_valuations."""
+    return username.removeprefix("@").lower()
+
+
+def _jsonb_encode(value) -> bytes:
+    # Binary jsonb wire format is a version byte followed by the JSON text
+    return b"\x01" + orjson.dumps(value)
+
+
+def _jsonb_decode(data: bytes):
+    return orjson.loads(data[1:])
+
+
+async def _init_connection(conn: asyncpg.Connection) -> None:
+    """Register the jsonb codec when the pool opens a new connection."""
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=_jsonb_encode,
+        decoder=_jsonb_decode,
+        schema="pg_catalog",
+        format="binary"
+    )
 
 
 class Database:
     def __init__(self):
         self.pool: Optional[asyncpg.Pool] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._event_task: Optional[asyncio.Task] = None
+        self._partition_task: Optional[asyncio.Task] = None
+        self._stats_task: Optional[asyncio.Task] = None
+        self._event_queue: asyncio.Queue = asyncio.Queue()
+        # user_id -> language, saves a round-trip on almost every update
+        self._lang_cache: TTLCache = TTLCache(
+            maxsize=settings.LANG_CACHE_SIZE, ttl=settings.LANG_CACHE_TTL
+        )
+        # normalized username -> valuation; rows are never updated once written
+        self._val_cache: LRUCache = LRUCache(maxsize=settings.VALUATION_CACHE_SIZE)
+        # admin_id -> notification settings, read on every notification; only a handful of admins
+        self._notify_cache: dict[int, dict] = {}
+        # setting_key -> value (None if unset); written through by set_system_setting
+        self._settings_cache: TTLCache = TTLCache(maxsize=256, ttl=60)
+        # Called after each flushed batch, so caches of live figures can be dropped
+        self._flush_listeners: list[Callable[[], None]] = []
 
     async def connect(self) -> None:
-        self.pool = await asyncpg.create_pool(dsn=PG_DSN)
+        # Schema is applied on a one-off connection before the pool opens
         await self._create_tables()
+        self.pool = await asyncpg.create_pool(
+            dsn=settings.PG_DSN,
+            min_size=settings.PG_POOL_MIN,
+            max_size=settings.PG_POOL_MAX,
+            # Never recycle idle connections: that would drop their prepared statements,
+            # broken ones are caught by _health_loop instead
+            max_inactive_connection_lifetime=0,
+            max_queries=50000,
+            command_timeout=settings.PG_CMD_TIMEOUT,
+            # Covers every distinct query text in this module, hot-path ones included
+            statement_cache_size=64,
+            max_cached_statement_lifetime=0,
+            init=_init_connection,
+            # Short OLTP queries only: JIT compilation costs more than it saves
+            server_settings={"jit": "off", "application_name": "valubot"}
+        )
+        await self._warm_pool()
+        self._health_task = asyncio.create_task(self._health_loop())
+        self._event_task = asyncio.create_task(self._event_flusher())
+        self._partition_task = asyncio.create_task(self._partition_loop())
+        self._stats_task = asyncio.create_task(self._stats_refresher())
+
+    async def _ping(self) -> None:
+        async with self.pool.acquire() as conn:
+            await conn.execute("SELECT 1")
+
+    async def _warm_pool(self) -> None:
+        """Open and ping min_size connections so first requests don't pay connect cost."""
+        await asyncio.gather(*[self._ping() for _ in range(self.pool.get_min_size())])
+
+    async def _health_loop(self) -> None:
+        """Ping idle connections periodically so broken ones are replaced off the request path."""
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+            try:
+                await asyncio.gather(*[self._ping() for _ in range(self.pool.get_idle_size())])
+            except Exception as e:
+                logger.warning(f"Pool health check failed: {e}")
+
+    async def _partition_loop(self) -> None:
+        """Keep events partitions created three months ahead of the current date."""
+        while True:
+            try:
+                await self.pool.execute(
+                    "SELECT ensure_events_partitions(CURRENT_DATE, (CURRENT_DATE + INTERVAL '3 months')::date)"
+                )
+            except Exception as e:
+                logger.warning(f"Events partition check failed: {e}")
+            await asyncio.sleep(PARTITION_CHECK_INTERVAL)
+
+    async def _stats_refresher(self) -> None:
+        """Keep today's daily_stats_cache row fresh; finalize the previous day once it ends."""
+        last_day = date.today() - timedelta(days=1)
+        while True:
+            today = date.today()
+            try:
+                if last_day != today:
+                    await self.refresh_daily_stats(last_day)
+                    last_day = today
+                await self.refresh_daily_stats(today)
+            except Exception as e:
+                logger.warning(f"Daily stats refresh failed: {e}")
+            await asyncio.sleep(STATS_REFRESH_INTERVAL)
+
+    async def _event_flusher(self) -> None:
+        """Collect queued events into batches and write each batch in one round-trip."""
+        loop = asyncio.get_running_loop()
+        batch: list[tuple] = []
+        try:
+            while True:
+                batch.append(await self._event_queue.get())
+                deadline = loop.time() + EVENT_FLUSH_INTERVAL
+                while len(batch) < EVENT_FLUSH_BATCH:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._event_queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                # Retried in place, new events keep queueing meanwhile; a lost connection
+                # or brief outage then costs latency instead of the batch
+                attempt = 0
+                while not await self._flush_events(batch):
+                    attempt += 1
+                    if attempt > EVENT_FLUSH_RETRIES:
+                        logger.error(f"Dropping {len(batch)} events after {EVENT_FLUSH_RETRIES} retries")
+                        break
+                    await asyncio.sleep(EVENT_FLUSH_RETRY_DELAY * attempt)
+                batch = []
+        except asyncio.CancelledError:
+            # Interrupted flushes roll back, so the batch can be written again safely
+            if batch:
+                await self._flush_events(batch)
+            raise
+
+    async def _flush_events(self, batch: list[tuple]) -> bool:
+        """Write a batch of events in one transaction; returns False if it was rolled back."""
+        # Latest activity and username per user, so each user row is updated once per batch
+        records = []
+        last_seen: dict[int, datetime] = {}
+        usernames: dict[int, Optional[str]] = {}
+        for user_id, event_type, metadata, ts, username in batch:
+            records.append((user_id, event_type, metadata, ts))
+            last_seen[user_id] = ts
+            if username or user_id not in usernames:
+                usernames[user_id] = username
+        try:
+            async with self.pool.acquire() as conn, conn.transaction():
+                await conn.copy_records_to_table("events", records=records, columns=EVENT_COLUMNS)
+                await conn.execute(
+                    SQL_TOUCH_USERS,
+                    list(last_seen), list(last_seen.values()), [usernames[u] for u in last_seen]
+                )
+        except Exception as e:
+            logger.error(f"Failed to flush {len(batch)} events: {e}")
+            return False
+        for listener in self._flush_listeners:
+            listener()
+        return True
+    
+    def add_flush_listener(self, listener: Callable[[], None]) -> None:
+        """Register a callback run every time a batch of events reaches the database."""
+        self._flush_listeners.append(listener)
 
     async def close(self) -> None:
+        if self._event_task:
+            self._event_task.cancel()
+            try:
+                await self._event_task
+            except asyncio.CancelledError:
+                pass
+            self._event_task = None
+        # Write out whatever was still queued at shutdown
+        pending = []
+        while not self._event_queue.empty():
+            pending.append(self._event_queue.get_nowait())
+        if pending and self.pool:
+            await self._flush_events(pending)
+        for task in (self._health_task, self._partition_task, self._stats_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._health_task = None
+        self._partition_task = None
+        self._stats_task = None
         if self.pool:
             await self.pool.close()
 
     async def _create_tables(self) -> None:
-        async with self.pool.acquire() as conn:
-            # Users table with extended fields
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id BIGINT PRIMARY KEY,
-                    language VARCHAR(5) DEFAULT 'en',
-                    join_date TIMESTAMP DEFAULT NOW(),
-                    first_seen TIMESTAMP DEFAULT NOW(),
-                    last_activity TIMESTAMP DEFAULT NOW(),
-                    username VARCHAR(255),
-                    is_admin BOOLEAN DEFAULT FALSE
+        # One-off DDL connection, kept out of the pool and its statement cache
+        conn = await asyncpg.connect(dsn=settings.PG_DSN, statement_cache_size=0)
+        try:
+            # Steady-state restarts: schema already at current version, skip DDL
+            if await conn.fetchval("SELECT to_regclass('system_settings') IS NOT NULL"):
+                version = await conn.fetchval(
+                    "SELECT setting_value FROM system_settings WHERE setting_key = 'schema_version'"
                 )
-            """)
-            
-            # Add new columns if they don't exist (migration)
-            await conn.execute("""
-                DO $$ 
-                BEGIN
-                    BEGIN
-                        ALTER TABLE users ADD COLUMN first_seen TIMESTAMP DEFAULT NOW();
-                    EXCEPTION
-                        WHEN duplicate_column THEN NULL;
-                    END;
-                    BEGIN
-                        ALTER TABLE users ADD COLUMN last_activity TIMESTAMP DEFAULT NOW();
-                    EXCEPTION
-                        WHEN duplicate_column THEN NULL;
-                    END;
-                    BEGIN
-                        ALTER TABLE users ADD COLUMN username VARCHAR(255);
-                    EXCEPTION
-                        WHEN duplicate_column THEN NULL;
-                    END;
-                    BEGIN
-                        ALTER TABLE users ADD COLUMN is_admin BOOLEAN DEFAULT FALSE;
-                    EXCEPTION
-                        WHEN duplicate_column THEN NULL;
-                    END;
-                    BEGIN
-                        ALTER TABLE users ADD COLUMN is_bot_blocked BOOLEAN DEFAULT FALSE;
-                    EXCEPTION
-                        WHEN duplicate_column THEN NULL;
-                    END;
-                    BEGIN
-                        ALTER TABLE users ADD COLUMN last_valuation_date TIMESTAMP;
-                    EXCEPTION
-                        WHEN duplicate_column THEN NULL;
-                    END;
-                    BEGIN
-                        ALTER TABLE users ADD COLUMN contacted_manager BOOLEAN DEFAULT FALSE;
-                    EXCEPTION
-                        WHEN duplicate_column THEN NULL;
-                    END;
-                    BEGIN
-                        ALTER TABLE users ADD COLUMN reminder_sent BOOLEAN DEFAULT FALSE;
-                    EXCEPTION
-                        WHEN duplicate_column THEN NULL;
-                    END;
-                END $$;
-            """)
+                if version == SCHEMA_VERSION:
+                    return
             
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS username_valuations (
-                    username VARCHAR(33) PRIMARY KEY,
-                    structure VARCHAR(50),
-                    category VARCHAR(50),
-                    rarity VARCHAR(50),
-                    demand VARCHAR(50),
-                    score VARCHAR(10),
-                    branding VARCHAR(50),
-                    price_low INTEGER,
-                    price_high INTEGER,
-                    created_at TIMESTAMP DEFAULT NOW()
-                )
-            """)
-            
-            # Events table for logging
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS events (
-                    id BIGSERIAL PRIMARY KEY,
-                    user_id BIGINT NOT NULL,
-                    event_type VARCHAR(50) NOT NULL,
-                    timestamp TIMESTAMP DEFAULT NOW(),
-                    metadata JSONB DEFAULT '{}'::jsonb
-                )
-            """)
-            
-            # Create indexes for events table
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_events_user_id ON events(user_id);
-            """)
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_events_event_type ON events(event_type);
-            """)
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp);
-            """)
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_events_user_event ON events(user_id, event_type);
-            """)
-            
-            # Admin notification settings table
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS admin_notification_settings (
-                    admin_id BIGINT PRIMARY KEY,
-                    notify_new_users BOOLEAN DEFAULT TRUE,
-                    notify_orders BOOLEAN DEFAULT TRUE,
-                    notify_abandoned_checkouts BOOLEAN DEFAULT TRUE,
-                    abandoned_threshold INTEGER DEFAULT 10,
-                    updated_at TIMESTAMP DEFAULT NOW()
-                )
-            """)
-            
-            # Daily stats cache table
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS daily_stats_cache (
-                    stat_date DATE PRIMARY KEY,
-                    total_users INTEGER DEFAULT 0,
-                    new_users INTEGER DEFAULT 0,
-                    bot_restarts INTEGER DEFAULT 0,
-                    group_visits INTEGER DEFAULT 0,
-                    manager_contacts INTEGER DEFAULT 0,
-                    nickname_checks INTEGER DEFAULT 0,
-                    checkout_starts INTEGER DEFAULT 0,
-                    successful_orders INTEGER DEFAULT 0,
-                    abandoned_checkouts INTEGER DEFAULT 0,
-                    updated_at TIMESTAMP DEFAULT NOW()
-                )
-            """)
-            
-            # Valuations table for tracking user evaluations
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS valuations (
-                    id BIGSERIAL PRIMARY KEY,
-                    user_id BIGINT NOT NULL,
-                    username_checked VARCHAR(255) NOT NULL,
-                    estimated_price VARCHAR(100),
-                    valuation_date TIMESTAMP DEFAULT NOW(),
-                    manager_contacted BOOLEAN DEFAULT FALSE,
-                    reminder_sent BOOLEAN DEFAULT FALSE,
-                    reminder_sent_at TIMESTAMP
-                )
-            """)
-            
-            # Create indexes for valuations table
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_valuations_user_id ON valuations(user_id);
-            """)
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_valuations_date ON valuations(valuation_date);
-            """)
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_valuations_reminder ON valuations(reminder_sent, manager_contacted);
-            """)
-            
-            # System settings table for configurable parameters
-            await conn.execute("""
-                CREATE TABLE IF NOT EXISTS system_settings (
-                    setting_key VARCHAR(100) PRIMARY KEY,
-                    setting_value TEXT NOT NULL,
-                    setting_type VARCHAR(20) DEFAULT 'string',
-                    description TEXT,
-                    updated_at TIMESTAMP DEFAULT NOW(),
-                    updated_by BIGINT
-                )
-            """)
-            
-            # Initialize default settings
-            await conn.execute("""
-                INSERT INTO system_settings (setting_key, setting_value, setting_type, description)
-                VALUES 
-                    ('reminder_check_interval', '1', 'int', 'Interval in minutes to check for pending reminders'),
-                    ('reminder_enabled', 'true', 'bool', 'Enable/disable reminder system'),
-                    ('reminder_delay_minutes', '15', 'int', 'Minutes to wait before sending reminder after valuation')
-                ON CONFLICT (setting_key) DO NOTHING
-            """)
+            # Whole schema in a single round-trip, applied atomically
+            async with conn.transaction():
+                await conn.execute(DDL_SCRIPT)
+                await conn.execute("""
+                    INSERT INTO system_settings (setting_key, setting_value, setting_type, description)
+                    VALUES ('schema_version', $1, 'string', 'Version of the applied DDL_SCRIPT')
+                    ON CONFLICT (setting_key) DO UPDATE SET setting_value = EXCLUDED.setting_value
+                """, SCHEMA_VERSION)
+        finally:
+            await conn.close()
     
     async def add_user(self, user_id: int) -> None:
         async with self.pool.acquire() as conn:
-            await conn.execute(
-                "INSERT INTO users (user_id) VALUES ($1) ON CONFLICT DO NOTHING",
-                user_id
-            )
+            inserted = await conn.fetchval(SQL_ADD_USER, user_id)
+        # Only a freshly inserted row is known to have the default language
+        if inserted is not None:
+            self._lang_cache[user_id] = "en"
 
     async def set_language(self, user_id: int, lang: str) -> None:
         async with self.pool.acquire() as conn:
-            await conn.execute(
-                "UPDATE users SET language = $2 WHERE user_id = $1",
-                user_id, lang
-            )
+            await conn.execute(SQL_SET_LANGUAGE, user_id, lang)
+        self._lang_cache[user_id] = lang
+
+    async def upsert_user(self, user_id: int, lang: Optional[str] = None) -> None:
+        """Register user and optionally set language in a single statement."""
+        async with self.pool.acquire() as conn:
+            language = await conn.fetchval(SQL_UPSERT_USER, user_id, lang)
+        self._lang_cache[user_id] = language
 
     async def get_language(self, user_id: int) -> str:
+        cached = self._lang_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
         async with self.pool.acquire() as conn:
-            result = await conn.fetchval(
-                "SELECT language FROM users WHERE user_id = $1",
-                user_id
-            )
-            return result if result else "en"
+            result = await conn.fetchval(SQL_GET_LANGUAGE, user_id)
+        lang = result if result else "en"
+        self._lang_cache[user_id] = lang
+        return lang
 
     async def get_valuation(self, username: str) -> dict | None:
         """Get cached valuation for username."""
-        clean_username = username.lstrip("@").lower()
+        clean_username = _norm_username(username)
+        cached = self._val_cache.get(clean_username)
+        if cached is not None:
+            return dict(cached)
+        
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT * FROM username_valuations WHERE username = $1",
-                clean_username
-            )
-            if row:
-                return {
-                    "username": f"@{clean_username}",
-                    "structure": row["structure"],
-                    "category": row["category"],
-                    "rarity": row["rarity"],
-                    "demand": row["demand"],
-                    "score": row["score"],
-                    "branding": row["branding"],
-                    "price_low": row["price_low"],
-                    "price_high": row["price_high"],
-                }
+            row = await conn.fetchrow(SQL_GET_VALUATION, clean_username)
+        if row is None:
             return None
+        structure, category, rarity, demand, score, branding, price_low, price_high = row
+        valuation = {
+            "username": f"@{clean_username}",
+            "structure": structure,
+            "category": category,
+            "rarity": rarity,
+            "demand": demand,
+            "score": score,
+            "branding": branding,
+            "price_low": price_low,
+            "price_high": price_high,
+        }
+        self._val_cache[clean_username] = valuation
+        return dict(valuation)
 
     async def save_valuation(self, data: dict) -> None:
         """Save valuation data to cache."""
-        clean_username = data["username"].lstrip("@").lower()
+        clean_username = _norm_username(data["username"])
         async with self.pool.acquire() as conn:
-            await conn.execute(
-                """
-                INSERT INTO username_valuations 
-                (username, structure, category, rarity, demand, score, branding, price_low, price_high)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                ON CONFLICT (username) DO NOTHING
-                """,
+            inserted = await conn.fetchval(
+                SQL_SAVE_VALUATION,
                 clean_username,
                 data["structure"],
                 data["category"],
@@ -261,26 +683,21 @@ class Database:
                 data["price_low"],
                 data["price_high"]
             )
+        # On conflict the stored row wins, so only cache what was actually written
+        if inserted is not None:
+            self._val_cache[clean_username] = {**data, "username": f"@{clean_username}"}
     
     # ==================== Event Logging Methods ====================
     
-    async def add_event(self, user_id: int, event_type: str, metadata: dict = None) -> None:
-        """Log an event to the database."""
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                """
-                INSERT INTO events (user_id, event_type, metadata)
-                VALUES ($1, $2, $3)
-                """,
-                user_id,
-                event_type,
-                json.dumps(metadata or {})
-            )
-            # Update user last activity
-            await conn.execute(
-                "UPDATE users SET last_activity = NOW() WHERE user_id = $1",
-                user_id
-            )
+    async def add_event(
+        self,
+        user_id: int,
+        event_type: str,
+        metadata: dict = None,
+        username: Optional[str] = None
+    ) -> None:
+        """Queue an event for the background flusher, which also updates user last activity and username."""
+        self._event_queue.put_nowait((user_id, event_type, metadata or {}, datetime.now(), username))
     
     async def get_events(
         self,
@@ -292,36 +709,10 @@ class Database:
         offset: int = 0
     ) -> list[dict]:
         """Get events with filters."""
-        query = "SELECT * FROM events WHERE 1=1"
-        params = []
-        param_idx = 1
-        
-        if user_id:
-            query += f" AND user_id = ${param_idx}"
-            params.append(user_id)
-            param_idx += 1
-        
-        if event_type:
-            query += f" AND event_type = ${param_idx}"
-            params.append(event_type)
-            param_idx += 1
-        
-        if start_date:
-            query += f" AND timestamp >= ${param_idx}"
-            params.append(start_date)
-            param_idx += 1
-        
-        if end_date:
-            query += f" AND timestamp <= ${param_idx}"
-            params.append(end_date)
-            param_idx += 1
-        
-        query += f" ORDER BY timestamp DESC LIMIT ${param_idx} OFFSET ${param_idx + 1}"
-        params.extend([limit, offset])
-        
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(query, *params)
-            return [dict(row) for row in rows]
+        rows = await self.pool.fetch(
+            SQL_GET_EVENTS, user_id, event_type, start_date, end_date, limit, offset
+        )
+        return [dict(row) for row in rows]
     
     async def get_event_count(
         self,
@@ -330,121 +721,129 @@ class Database:
         end_date: Optional[datetime] = None
     ) -> int:
         """Get count of events with filters."""
-        query = "SELECT COUNT(*) FROM events WHERE 1=1"
-        params = []
-        param_idx = 1
-        
-        if event_type:
-            query += f" AND event_type = ${param_idx}"
-            params.append(event_type)
-            param_idx += 1
-        
-        if start_date:
-            query += f" AND timestamp >= ${param_idx}"
-            params.append(start_date)
-            param_idx += 1
-        
-        if end_date:
-            query += f" AND timestamp <= ${param_idx}"
-            params.append(end_date)
-            param_idx += 1
-        
-        async with self.pool.acquire() as conn:
-            return await conn.fetchval(query, *params)
+        return await self.pool.fetchval(
+            SQL_COUNT_EVENTS, None, event_type, start_date, end_date
+        )
+    
+    async def get_event_counts(
+        self,
+        event_types: Sequence[str],
+        start_date: datetime,
+        end_date: datetime
+    ) -> dict[str, int]:
+        """Get event counts per type in [start_date, end_date) with one grouped query."""
+        # asyncpg encodes any sequence as an array, so EventType.all_types() goes in as is
+        rows = await self.pool.fetch(SQL_COUNT_EVENTS_BY_TYPE, event_types, start_date, end_date)
+        counts = dict.fromkeys(event_types, 0)
+        for event_type, count in rows:
+            counts[event_type] = count
+        return counts
     
     # ==================== Statistics Methods ====================
     
     async def get_total_users(self) -> int:
         """Get total number of users."""
-        async with self.pool.acquire() as conn:
-            return await conn.fetchval("SELECT COUNT(*) FROM users")
+        return await self.pool.fetchval("SELECT COUNT(*) FROM users")
     
     async def get_new_users(self, start_date: datetime, end_date: datetime) -> int:
-        """Get number of new users in date range."""
-        async with self.pool.acquire() as conn:
-            return await conn.fetchval(
-                "SELECT COUNT(*) FROM users WHERE first_seen >= $1 AND first_seen <= $2",
-                start_date, end_date
-            )
+        """Get number of new users in [start_date, end_date)."""
+        return await self.pool.fetchval(
+            "SELECT COUNT(*) FROM users WHERE first_seen >= $1 AND first_seen < $2",
+            start_date, end_date
+        )
+    
+    async def refresh_daily_stats(self, day: date) -> dict:
+        """Recompute the daily_stats_cache row for a day and return it."""
+        row = await self.pool.fetchrow(SQL_REFRESH_DAILY_STATS, day)
+        return dict(row)
+    
+    async def get_daily_stats(self, day: date) -> Optional[dict]:
+        """Get the cached daily statistics row for a day."""
+        row = await self.pool.fetchrow(SQL_GET_DAILY_STATS, day)
+        return dict(row) if row else None
     
     async def get_user_stats(self, user_id: int) -> Optional[dict]:
         """Get statistics for a specific user."""
-        async with self.pool.acquire() as conn:
-            user = await conn.fetchrow(
-                "SELECT * FROM users WHERE user_id = $1",
-                user_id
-            )
-            if not user:
-                return None
-            
-            event_counts = await conn.fetch(
-                """
-                SELECT event_type, COUNT(*) as count
-                FROM events
-                WHERE user_id = $1
-                GROUP BY event_type
-                """,
-                user_id
-            )
-            
-            stats = dict(user)
-            stats['event_counts'] = {row['event_type']: row['count'] for row in event_counts}
-            return stats
+        row = await self.pool.fetchrow(
+            """
+            SELECT u.user_id, u.username, u.language, u.first_seen, u.last_activity,
+                   COALESCE(
+                       (SELECT jsonb_object_agg(event_type, count)
+                        FROM (
+                            SELECT event_type, COUNT(*) AS count
+                            FROM events
+                            WHERE user_id = u.user_id
+                            GROUP BY event_type
+                        ) c),
+                       '{}'::jsonb
+                   ) AS event_counts
+            FROM users u
+            WHERE u.user_id = $1
+            """,
+            user_id
+        )
+        if not row:
+            return None
+        
+        return dict(row)
     
-    async def get_users_list(self, limit: int = 10, offset: int = 0) -> list[dict]:
-        """Get paginated list of users."""
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(
-                """
-                SELECT user_id, username, first_seen, last_activity,
-                       (SELECT COUNT(*) FROM events WHERE events.user_id = users.user_id) as total_events
+    async def get_users_page(self, limit: int = 10, offset: int = 0) -> tuple[list[dict], int]:
+        """Get a page of users together with the total number of users."""
+        rows = await self.pool.fetch(
+            """
+            SELECT u.user_id, u.username, u.first_seen, u.last_activity, e.total_events, u.total
+            FROM (
+                SELECT user_id, username, first_seen, last_activity, COUNT(*) OVER() AS total
                 FROM users
-                ORDER BY (username IS NOT NULL AND username != '') DESC, last_activity DESC
+                ORDER BY (username IS NOT NULL AND username <> '') DESC, last_activity DESC
                 LIMIT $1 OFFSET $2
-                """,
-                limit, offset
-            )
-            return [dict(row) for row in rows]
+            ) u
+            CROSS JOIN LATERAL (
+                SELECT COUNT(*) AS total_events FROM events WHERE events.user_id = u.user_id
+            ) e
+            ORDER BY (u.username IS NOT NULL AND u.username <> '') DESC, u.last_activity DESC
+            """,
+            limit, offset
+        )
+        if not rows:
+            # Window count is unavailable past the last page
+            return [], await self.get_total_users() if offset else 0
+        
+        users = []
+        for row in rows:
+            user = dict(row)
+            total = user.pop('total')
+            users.append(user)
+        return users, total
     
     async def update_user_info(self, user_id: int, username: Optional[str] = None) -> None:
         """Update user information."""
         async with self.pool.acquire() as conn:
-            if username:
-                await conn.execute(
-                    "UPDATE users SET username = $2, last_activity = NOW() WHERE user_id = $1",
-                    user_id, username
-                )
-            else:
-                await conn.execute(
-                    "UPDATE users SET last_activity = NOW() WHERE user_id = $1",
-                    user_id
-                )
+            await conn.execute(SQL_UPDATE_USER_INFO, user_id, username)
     
     # ==================== Notification Settings Methods ====================
     
     async def get_notification_settings(self, admin_id: int) -> dict:
         """Get notification settings for admin."""
+        cached = self._notify_cache.get(admin_id)
+        if cached is not None:
+            return dict(cached)
+        
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT * FROM admin_notification_settings WHERE admin_id = $1",
-                admin_id
-            )
-            if row:
-                return dict(row)
+            row = await conn.fetchrow(SQL_GET_NOTIFICATION_SETTINGS, admin_id)
+        if row:
+            result = dict(row)
+        else:
             # Return defaults
-            from config import (
-                DEFAULT_NOTIFY_NEW_USERS,
-                DEFAULT_NOTIFY_ORDERS,
-                DEFAULT_NOTIFY_ABANDONED,
-                DEFAULT_ABANDONED_THRESHOLD
-            )
-            return {
+            result = {
                 'admin_id': admin_id,
-                'notify_new_users': DEFAULT_NOTIFY_NEW_USERS,
-                'notify_orders': DEFAULT_NOTIFY_ORDERS,
-                'notify_abandoned_checkouts': DEFAULT_NOTIFY_ABANDONED,
-                'abandoned_threshold': DEFAULT_ABANDONED_THRESHOLD
+                'notify_new_users': settings.DEFAULT_NOTIFY_NEW_USERS,
+                'notify_orders': settings.DEFAULT_NOTIFY_ORDERS,
+                'notify_abandoned_checkouts': settings.DEFAULT_NOTIFY_ABANDONED,
+                'abandoned_threshold': settings.DEFAULT_ABANDONED_THRESHOLD
             }
+        self._notify_cache[admin_id] = result
+        return dict(result)
     
     async def update_notification_settings(
         self,
@@ -454,85 +853,92 @@ class Database:
         notify_abandoned_checkouts: Optional[bool] = None,
         abandoned_threshold: Optional[int] = None
     ) -> None:
-        """Update notification settings for admin."""
-        async with self.pool.acquire() as conn:
-            # Check if settings exist
-            exists = await conn.fetchval(
-                "SELECT EXISTS(SELECT 1 FROM admin_notification_settings WHERE admin_id = $1)",
-                admin_id
+        """Update notification settings for admin, keeping fields that are not passed."""
+        row = await self.pool.fetchrow(
+            """
+            INSERT INTO admin_notification_settings
+            (admin_id, notify_new_users, notify_orders, notify_abandoned_checkouts, abandoned_threshold)
+            VALUES (
+                $1,
+                COALESCE($2::boolean, $6::boolean),
+                COALESCE($3::boolean, $7::boolean),
+                COALESCE($4::boolean, $8::boolean),
+                COALESCE($5::int, $9::int)
             )
-            
-            if exists:
-                # Update existing
-                updates = []
-                params = [admin_id]
-                param_idx = 2
-                
-                if notify_new_users is not None:
-                    updates.append(f"notify_new_users = ${param_idx}")
-                    params.append(notify_new_users)
-                    param_idx += 1
-                
-                if notify_orders is not None:
-                    updates.append(f"notify_orders = ${param_idx}")
-                    params.append(notify_orders)
-                    param_idx += 1
-                
-                if notify_abandoned_checkouts is not None:
-                    updates.append(f"notify_abandoned_checkouts = ${param_idx}")
-                    params.append(notify_abandoned_checkouts)
-                    param_idx += 1
-                
-                if abandoned_threshold is not None:
-                    updates.append(f"abandoned_threshold = ${param_idx}")
-                    params.append(abandoned_threshold)
-                    param_idx += 1
-                
-                if updates:
-                    updates.append("updated_at = NOW()")
-                    query = f"UPDATE admin_notification_settings SET {', '.join(updates)} WHERE admin_id = $1"
-                    await conn.execute(query, *params)
-            else:
-                # Insert new
-                await conn.execute(
-                    """
-                    INSERT INTO admin_notification_settings 
-                    (admin_id, notify_new_users, notify_orders, notify_abandoned_checkouts, abandoned_threshold)
-                    VALUES ($1, $2, $3, $4, $5)
-                    """,
-                    admin_id,
-                    notify_new_users if notify_new_users is not None else True,
-                    notify_orders if notify_orders is not None else True,
-                    notify_abandoned_checkouts if notify_abandoned_checkouts is not None else True,
-                    abandoned_threshold if abandoned_threshold is not None else 10
-                )
+            ON CONFLICT (admin_id) DO UPDATE SET
+                notify_new_users = COALESCE($2::boolean, admin_notification_settings.notify_new_users),
+                notify_orders = COALESCE($3::boolean, admin_notification_settings.notify_orders),
+                notify_abandoned_checkouts = COALESCE($4::boolean, admin_notification_settings.notify_abandoned_checkouts),
+                abandoned_threshold = COALESCE($5::int, admin_notification_settings.abandoned_threshold),
+                updated_at = NOW()
+            RETURNING admin_id, notify_new_users, notify_orders, notify_abandoned_checkouts, abandoned_threshold
+            """,
+            admin_id,
+            notify_new_users,
+            notify_orders,
+            notify_abandoned_checkouts,
+            abandoned_threshold,
+            # New rows start from the same defaults get_notification_settings reports
+            settings.DEFAULT_NOTIFY_NEW_USERS,
+            settings.DEFAULT_NOTIFY_ORDERS,
+            settings.DEFAULT_NOTIFY_ABANDONED,
+            settings.DEFAULT_ABANDONED_THRESHOLD
+        )
+        self._notify_cache[admin_id] = dict(row)
     
-    # Valuation methods
-    async def create_valuation(self, user_id: int, username_checked: str, estimated_price: str) -> int:
-        """Create a new valuation record."""
+    async def toggle_notification_setting(self, admin_id: int, column: str) -> dict:
+        """Flip one notification flag for admin atomically and return the updated settings."""
+        defaults = {
+            'notify_new_users': settings.DEFAULT_NOTIFY_NEW_USERS,
+            'notify_orders': settings.DEFAULT_NOTIFY_ORDERS,
+            'notify_abandoned_checkouts': settings.DEFAULT_NOTIFY_ABANDONED,
+        }
+        # A first toggle starts from the defaults, with this flag already flipped
+        defaults[column] = not defaults[column]
+        
         async with self.pool.acquire() as conn:
-            # Update user's last valuation date and reset flags
-            await conn.execute(
-                """
-                UPDATE users 
-                SET last_valuation_date = NOW(), 
-                    contacted_manager = FALSE, 
-                    reminder_sent = FALSE
-                WHERE user_id = $1
-                """,
-                user_id
+            row = await conn.fetchrow(
+                SQL_TOGGLE_NOTIFICATION[column],
+                admin_id,
+                defaults['notify_new_users'],
+                defaults['notify_orders'],
+                defaults['notify_abandoned_checkouts'],
+                settings.DEFAULT_ABANDONED_THRESHOLD
             )
-            
-            # Create valuation record
-            valuation_id = await conn.fetchval(
-                """
+        result = dict(row)
+        self._notify_cache[admin_id] = result
+        return dict(result)
+    
+    # Valuation methods
+    async def create_valuation(
+        self,
+        user_id: int,
+        username_checked: str,
+        estimated_price: str,
+        username: Optional[str] = None
+    ) -> int:
+        """Create a new valuation record, refreshing the user's username if given."""
+        # Insert the valuation and point the user at it with reset flags in one statement
+        return await self.pool.fetchval(
+            """
+            WITH v AS (
                 INSERT INTO valuations (user_id, username_checked, estimated_price, valuation_date)
                 VALUES ($1, $2, $3, NOW())
                 RETURNING id
-                """,
-                user_id, username_checked, estimated_price
+            ), u AS (
+                UPDATE users
+                SET username = COALESCE(NULLIF($4, ''), username),
+                    last_activity = NOW(),
+                    last_valuation_date = NOW(),
+                    contacted_manager = FALSE,
+                    reminder_sent = FALSE,
+                    latest_valuation_id = (SELECT id FROM v)
+                WHERE user_id = $1
             )
-            return valuation_id
+            SELECT id FROM v
+            """,
+            user_id, username_checked, estimated_price, username
+        )
     
     async def mark_manager_contacted(self, user_id: int) -> None:
         """Mark user as having contacted the manager."""
@@ -552,113 +958,147 @@ class Database:
             )
     
     async def mark_reminder_sent(self, user_id: int) -> None:
-        """Mark reminder as sent for user."""
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                "UPDATE users SET reminder_sent = TRUE WHERE user_id = $1",
-                user_id
-            )
-            # Update the latest valuation using subquery
-            await conn.execute(
-                """
-                UPDATE valuations 
+        """Mark reminder as sent for user's latest pending valuation."""
+        await self.pool.execute(
+            """
+            WITH v AS (
+                UPDATE valuations
                 SET reminder_sent = TRUE, reminder_sent_at = NOW()
                 WHERE id = (
-                    SELECT id 
-                    FROM valuations 
-                    WHERE user_id = $1 
-                    AND reminder_sent = FALSE
-                    AND manager_contacted = FALSE
+                    SELECT id FROM valuations
+                    WHERE user_id = $1 AND reminder_sent = FALSE AND manager_contacted = FALSE
                     ORDER BY valuation_date DESC
                     LIMIT 1
                 )
-                """,
-                user_id
             )
+            UPDATE users SET reminder_sent = TRUE WHERE user_id = $1
+            """,
+            user_id
+        )
+    
+    async def mark_reminders_sent(self, valuation_ids: list[int]) -> None:
+        """Mark reminders as sent for a batch of valuations, as returned by get_users_for_reminder."""
+        await self.pool.execute(
+            """
+            WITH v AS (
+                UPDATE valuations
+                SET reminder_sent = TRUE, reminder_sent_at = NOW()
+                WHERE id = ANY($1::bigint[])
+                RETURNING user_id
+            )
+            UPDATE users SET reminder_sent = TRUE
+            WHERE user_id IN (SELECT user_id FROM v)
+            """,
+            valuation_ids
+        )
     
     async def get_users_for_reminder(self, delay_minutes: int) -> list:
         """Get users who need reminders."""
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(
-                """
-                SELECT DISTINCT ON (u.user_id) u.user_id, u.username, v.id as valuation_id, v.valuation_date
-                FROM users u
-                INNER JOIN valuations v ON u.user_id = v.user_id
-                WHERE v.valuation_date < NOW() - INTERVAL '%s minutes'
-                AND v.manager_contacted = FALSE
-                AND v.reminder_sent = FALSE
-                AND u.is_bot_blocked = FALSE
-                ORDER BY u.user_id, v.valuation_date DESC
-                """ % delay_minutes
-            )
-            return [dict(row) for row in rows]
+        rows = await self.pool.fetch(
+            """
+            SELECT DISTINCT ON (u.user_id) u.user_id, u.username, u.language,
+                   v.id as valuation_id, v.valuation_date
+            FROM users u
+            INNER JOIN valuations v ON u.user_id = v.user_id
+            WHERE v.valuation_date < NOW() - ($1 * INTERVAL '1 minute')
+            AND v.manager_contacted = FALSE
+            AND v.reminder_sent = FALSE
+            AND u.is_bot_blocked = FALSE
+            ORDER BY u.user_id, v.valuation_date DESC
+            """,
+            delay_minutes
+        )
+        return [dict(row) for row in rows]
     
     async def mark_user_blocked(self, user_id: int) -> None:
         """Mark user as having blocked the bot."""
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                "UPDATE users SET is_bot_blocked = TRUE WHERE user_id = $1",
-                user_id
-            )
+        await self.pool.execute(
+            "UPDATE users SET is_bot_blocked = TRUE WHERE user_id = $1",
+            user_id
+        )
     
     async def mark_user_unblocked(self, user_id: int) -> None:
         """Mark user as having unblocked the bot."""
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                "UPDATE users SET is_bot_blocked = FALSE WHERE user_id = $1",
-                user_id
-            )
+        await self.pool.execute(
+            "UPDATE users SET is_bot_blocked = FALSE WHERE user_id = $1",
+            user_id
+        )
     
     # System Settings Methods
     async def get_system_setting(self, key: str, default: str = None) -> str:
         """Get system setting value by key."""
-        async with self.pool.acquire() as conn:
-            value = await conn.fetchval(
+        value = self._settings_cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = await self.pool.fetchval(
                 "SELECT setting_value FROM system_settings WHERE setting_key = $1",
                 key
             )
-            return value if value is not None else default
+            self._settings_cache[key] = value
+        return value if value is not None else default
+    
+    async def get_system_settings(self, keys: list[str]) -> dict[str, str]:
+        """Get several system settings in one query; keys that are not set are left out."""
+        values = {}
+        missing = []
+        for key in keys:
+            value = self._settings_cache.get(key, _MISSING)
+            if value is _MISSING:
+                missing.append(key)
+            elif value is not None:
+                values[key] = value
+        
+        if missing:
+            rows = await self.pool.fetch(
+                "SELECT setting_key, setting_value FROM system_settings WHERE setting_key = ANY($1::varchar[])",
+                missing
+            )
+            fetched = {row['setting_key']: row['setting_value'] for row in rows}
+            for key in missing:
+                value = fetched.get(key)
+                self._settings_cache[key] = value
+                if value is not None:
+                    values[key] = value
+        return values
     
     async def set_system_setting(self, key: str, value: str, admin_id: int = None) -> None:
         """Set system setting value."""
-        async with self.pool.acquire() as conn:
-            await conn.execute("""
-                INSERT INTO system_settings (setting_key, setting_value, updated_by, updated_at)
-                VALUES ($1, $2, $3, NOW())
-                ON CONFLICT (setting_key) 
-                DO UPDATE SET 
-                    setting_value = $2,
-                    updated_by = $3,
-                    updated_at = NOW()
-            """, key, value, admin_id)
+        await self.pool.execute("""
+            INSERT INTO system_settings (setting_key, setting_value, updated_by, updated_at)
+            VALUES ($1, $2, $3, NOW())
+            ON CONFLICT (setting_key) 
+            DO UPDATE SET 
+                setting_value = $2,
+                updated_by = $3,
+                updated_at = NOW()
+        """, key, value, admin_id)
+        self._settings_cache[key] = value
     
     async def get_all_system_settings(self) -> dict:
         """Get all system settings as a dictionary."""
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(
-                "SELECT setting_key, setting_value, setting_type, description FROM system_settings"
-            )
-            return {row['setting_key']: {
-                'value': row['setting_value'],
-                'type': row['setting_type'],
-                'description': row['description']
-            } for row in rows}
+        rows = await self.pool.fetch(
+            "SELECT setting_key, setting_value, setting_type, description FROM system_settings"
+        )
+        return {row['setting_key']: {
+            'value': row['setting_value'],
+            'type': row['setting_type'],
+            'description': row['description']
+        } for row in rows}
     
-    async def get_active_users_for_broadcast(self) -> list:
-        """Get all active users for broadcast (not blocked)."""
+    async def iter_active_users_for_broadcast(self) -> AsyncIterator[dict]:
+        """Stream all active users for broadcast (not blocked) through a server-side cursor."""
         if not self.pool:
             raise RuntimeError("Database pool is not initialized. Call connect() first.")
         
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(
+        async with self.pool.acquire() as conn, conn.transaction():
+            async for row in conn.cursor(
                 """
                 SELECT user_id, username, language
                 FROM users
                 WHERE is_bot_blocked = FALSE
                 ORDER BY user_id
-                """
-            )
-            return [dict(row) for row in rows]
-
+                """,
+                prefetch=1000
+            ):
+                yield dict(row)
 
 db = Database()
@@ -4,7 +4,8 @@ from datetime import datetime
 from typing import Optional
 
 
-@dataclass
+# Not frozen: metadata is a mutable dict
+@dataclass(slots=True)
 class Event:
     """Represents a user event."""
     id: Optional[int]
@@ -25,7 +26,7 @@ class Event:
         )
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class UserStats:
     """User statistics summary."""
     user_id: int
@@ -38,12 +39,13 @@ class UserStats:
     abandoned_checkouts: int
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class DailyStats:
     """Daily statistics summary."""
     stat_date: datetime
     total_users: int
     new_users: int
+    first_starts: int
     bot_restarts: int
     group_visits: int
     manager_contacts: int
@@ -51,9 +53,10 @@ class DailyStats:
     checkout_starts: int
     successful_orders: int
     abandoned_checkouts: int
+    exits_without_action: int
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class NotificationSettings:
     """Admin notification settings."""
     admin_id: int
@@ -64,7 +67,7 @@ class NotificationSettings:
     updated_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class User:
     """User model with extended fields."""
     user_id: int
@@ -97,7 +100,7 @@ class User:
         )
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Valuation:
     """Username valuation record."""
     id: Optional[int]
@@ -138,32 +141,51 @@ class EventType:
     SUCCESSFUL_ORDER = "successful_order"
     
     @classmethod
-    def all_types(cls) -> list[str]:
+    def all_types(cls) -> tuple[str, ...]:
         """Return all event types."""
-        return [
-            cls.FIRST_START,
-            cls.BOT_RESTART,
-            cls.GO_TO_GROUP,
-            cls.CONTACT_MANAGER,
-            cls.CHECK_NICKNAME,
-            cls.EXIT_WITHOUT_ACTION,
-            cls.START_CHECKOUT,
-            cls.ABANDONED_CHECKOUT,
-            cls.SUCCESSFUL_ORDER,
-        ]
+        return _ALL_TYPES
     
     @classmethod
     def get_emoji(cls, event_type: str) -> str:
         """Get emoji for event type."""
-        emoji_map = {
-            cls.FIRST_START: "🎉",
-            cls.BOT_RESTART: "🔄",
-            cls.GO_TO_GROUP: "👥",
-            cls.CONTACT_MANAGER: "💬",
-            cls.CHECK_NICKNAME: "🔍",
-            cls.EXIT_WITHOUT_ACTION: "🚪",
-            cls.START_CHECKOUT: "🛒",
-            cls.ABANDONED_CHECKOUT: "⚠️",
-            cls.SUCCESSFUL_ORDER: "✅",
-        }
-        return emoji_map.get(event_type, "📌")
+        return _EMOJI_MAP.get(event_type, "📌")
+
+
+# Built once at import so the EventType helpers don't allocate per call
+_ALL_TYPES = (
+    EventType.FIRST_START,
+    EventType.BOT_RESTART,
+    EventType.GO_TO_GROUP,
+    EventType.CONTACT_MANAGER,
+    EventType.CHECK_NICKNAME,
+    EventType.EXIT_WITHOUT_ACTION,
+    EventType.START_CHECKOUT,
+    EventType.ABANDONED_CHECKOUT,
+    EventType.SUCCESSFUL_ORDER,
+)
+
+_EMOJI_MAP = {
+    EventType.FIRST_START: "🎉",
+    EventType.BOT_RESTART: "🔄",
+    EventType.GO_TO_GROUP: "👥",
+    EventType.CONTACT_MANAGER: "💬",
+    EventType.CHECK_NICKNAME: "🔍",
+    EventType.EXIT_WITHOUT_ACTION: "🚪",
+    EventType.START_CHECKOUT: "🛒",
+    EventType.ABANDONED_CHECKOUT: "⚠️",
+    EventType.SUCCESSFUL_ORDER: "✅",
+}
+
+
+# daily_stats_cache column holding each event type's count for the day
+DAILY_STATS_COLUMNS = {
+    EventType.FIRST_START: "first_starts",
+    EventType.BOT_RESTART: "bot_restarts",
+    EventType.GO_TO_GROUP: "group_visits",
+    EventType.CONTACT_MANAGER: "manager_contacts",
+    EventType.CHECK_NICKNAME: "nickname_checks",
+    EventType.EXIT_WITHOUT_ACTION: "exits_without_action",
+    EventType.START_CHECKOUT: "checkout_starts",
+    EventType.ABANDONED_CHECKOUT: "abandoned_checkouts",
+    EventType.SUCCESSFUL_ORDER: "successful_orders",
+}
@@ -1,16 +1,22 @@
 """Admin handlers for statistics panel."""
+import asyncio
 import logging
-from datetime import datetime, timedelta, date
+from hashlib import blake2b
+from datetime import timedelta, date
+from typing import Awaitable, Callable, Optional
 
 from aiogram import Router, F
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
+from cachetools import LRUCache, TTLCache
 
-from database.db import db
+from database.db import DB_ERRORS, db
 from database.models import EventType
 from services.analytics import AnalyticsService
-from services.notifications import NotificationService
+from services.broadcast_service import BroadcastService
+from services.config_sync import config_sync
 from states import BroadcastStates, SettingsStates
 from keyboards.admin_keyboards import (
     get_admin_main_menu,
@@ -20,9 +26,14 @@ from keyboards.admin_keyboards import (
     get_notifications_settings_keyboard,
     get_back_to_main_keyboard,
     get_settings_menu,
-    get_settings_back_keyboard
+    get_settings_back_keyboard,
+    get_broadcast_menu_keyboard,
+    get_message_type_keyboard,
+    get_cancel_keyboard,
+    get_preview_keyboard
 )
 from utils.formatters import (
+    escape_html,
     format_main_stats,
     format_date_stats,
     format_period_stats,
@@ -30,28 +41,127 @@ from utils.formatters import (
     format_user_history,
     format_users_list
 )
-from config import ADMIN_IDS
+from middleware.admin_check import AdminCheckMiddleware
+from middleware.error_report import ErrorReportMiddleware
 
 
 router = Router()
 logger = logging.getLogger(__name__)
 
+# Every handler in this router is admin-only; the gate runs once a handler has matched,
+# so updates meant for other routers still propagate past this one
+router.message.middleware(AdminCheckMiddleware())
+router.callback_query.middleware(AdminCheckMiddleware())
+
+# Failures reported to the admin by ErrorReportMiddleware; anything else propagates to aiogram's error logging
+_HANDLER_ERRORS = (*DB_ERRORS, TelegramAPIError, ValueError)
+router.message.middleware(ErrorReportMiddleware(_HANDLER_ERRORS))
+router.callback_query.middleware(ErrorReportMiddleware(_HANDLER_ERRORS))
+
 # Initialize services
 analytics = AnalyticsService(db)
+broadcast_service = BroadcastService(db)
+
+# user_id -> "@username" / "ID n" header, filled by the detail screen and reused by history
+_user_display_cache: TTLCache = TTLCache(maxsize=512, ttl=300)
+
+# (chat_id, message_id) -> digest of the last screen rendered into that message
+_last_render: LRUCache = LRUCache(maxsize=1024)
+
+# Static screen headers, built once instead of per update
+_ADMIN_MAIN_TEXT = "🔧 <b>Админ-панель</b>\n\nВыберите действие:"
+_EVENTS_MENU_TEXT = "📋 <b>Статистика по типам событий</b>\n\nВыберите тип:"
+_NOTIF_TEXT = "🔔 <b>Настройки уведомлений</b>\n\nВыберите типы уведомлений, которые хотите получать:"
+_EVENT_STATS_TEXT = "{emoji} <b>Статистика: {event_type}</b>\n\nСегодня: <b>{count}</b>\n"
+_BROADCAST_MENU_TEXT = (
+    "📣 <b>Рассылка</b>\n\n"
+    "Здесь вы можете создать рассылку для всех пользователей бота.\n\n"
+    "Рассылка будет отправлена всем активным пользователям (не заблокировавшим бота)."
+)
+_BROADCAST_TYPE_TEXT = "📝 <b>Создание рассылки</b>\n\nВыберите тип сообщения:"
+_BROADCAST_TEXT_PROMPT = "📝 <b>Текст рассылки</b>\n\nОтправьте текст сообщения для рассылки:"
+_BROADCAST_PHOTO_PROMPT = "🖼 <b>Фото для рассылки</b>\n\nОтправьте фото:"
+_BROADCAST_CAPTION_PROMPT = "📝 <b>Подпись к фото</b>\n\nОтправьте текст, который будет под фото:"
+_BROADCAST_EDIT_PROMPT = "📝 <b>Новый текст рассылки</b>\n\nОтправьте новый текст сообщения:"
+
+
+_NO_DAYS = timedelta(0)
+_DAY = timedelta(days=1)
+_WEEK = timedelta(days=7)
+_MONTH = timedelta(days=30)
+
+# Notification flags that admin_notif_toggle:<name> may flip
+_NOTIF_TOGGLE_COLUMNS = frozenset({"notify_new_users", "notify_orders", "notify_abandoned_checkouts"})
+
+# Period callbacks -> (offset back to the first day, offset back to the last day)
+_PERIODS = {
+    "admin_stats_today": (_NO_DAYS, _NO_DAYS),
+    "admin_stats_yesterday": (_DAY, _DAY),
+    "admin_stats_week": (_WEEK, _NO_DAYS),
+    "admin_stats_month": (_MONTH, _NO_DAYS),
+}
+
+
+async def _period_stats_text(start_back: timedelta, end_back: timedelta) -> str:
+    """Render statistics for a single day or a date range counted back from today."""
+    today = date.today()
+    start_date = today - start_back
+    end_date = today - end_back
+    if start_date == end_date:
+        return format_date_stats(await analytics.get_stats_by_date(start_date))
+    
+    # The preceding period of the same length is closed, so it is usually a cache hit
+    prev_end = start_date - _DAY
+    prev_start = prev_end - (end_date - start_date)
+    stats, previous = await asyncio.gather(
+        analytics.get_stats_for_period(start_date, end_date),
+        analytics.get_stats_for_period(prev_start, prev_end)
+    )
+    return format_period_stats(stats, previous)
+
+
+async def _edit_screen(callback: CallbackQuery, text: str, reply_markup: InlineKeyboardMarkup) -> None:
+    """Edit the callback's message, skipping the Bot API call when the screen would not change."""
+    message = callback.message
+    key = (message.chat.id, message.message_id)
+    digest = blake2b(
+        text.encode() + reply_markup.model_dump_json().encode(), digest_size=8
+    ).digest()
+    if _last_render.get(key) == digest:
+        return
+    
+    try:
+        await message.edit_text(text, reply_markup=reply_markup, parse_mode="HTML")
+    except TelegramBadRequest as e:
+        # Digest was evicted or lost on restart, but the message already shows this screen
+        if "message is not modified" not in str(e):
+            raise
+    _last_render[key] = digest
+
+
+async def _delete_quietly(message: Message) -> None:
+    """Delete a message, ignoring Telegram refusing to (too old, already gone)."""
+    try:
+        await message.delete()
+    except TelegramAPIError:
+        pass
+
+
+def _tail_int(data: str) -> int:
+    """Parse the integer after the last ':' of a callback payload like 'admin_users_list:3'."""
+    return int(data[data.rindex(":") + 1:])
+
+
+def _user_display(user_id: int, username: Optional[str]) -> str:
+    """HTML-safe header label for a user: @username when known, otherwise the ID."""
+    return f"@{escape_html(username)}" if username else f"ID {user_id}"
 
 
 @router.message(Command("admin"))
 async def cmd_admin(message: Message):
     """Handle /admin command - open admin panel."""
-    if message.from_user.id not in ADMIN_IDS:
-        await message.answer("❌ У вас нет доступа к этой команде")
-        return
-    
-    text = "🔧 <b>Админ-панель</b>\n\n"
-    text += "Выберите действие:"
-    
     await message.answer(
-        text,
+        _ADMIN_MAIN_TEXT,
         reply_markup=get_admin_main_menu(),
         parse_mode="HTML"
     )
@@ -60,79 +170,49 @@ async def cmd_admin(message: Message):
 @router.message(Command("stats"))
 async def cmd_stats(message: Message):
     """Handle /stats command - show main statistics."""
-    if message.from_user.id not in ADMIN_IDS:
-        await message.answer("❌ У вас нет доступа к этой команде")
-        return
+    stats = await analytics.get_main_stats()
+    text = format_main_stats(stats)
     
-    try:
-        stats = await analytics.get_main_stats()
-        text = format_main_stats(stats)
-        
-        await message.answer(
-            text,
-            reply_markup=get_admin_main_menu(),
-            parse_mode="HTML"
-        )
-    except Exception as e:
-        logger.error(f"Error getting main stats: {e}")
-        await message.answer("❌ Ошибка при получении статистики")
+    await message.answer(
+        text,
+        reply_markup=get_admin_main_menu(),
+        parse_mode="HTML"
+    )
 
 
 @router.message(Command("stats_today"))
 async def cmd_stats_today(message: Message):
     """Handle /stats_today command - statistics for today."""
-    if message.from_user.id not in ADMIN_IDS:
-        await message.answer("❌ У вас нет доступа к этой команде")
-        return
+    text = await _period_stats_text(*_PERIODS["admin_stats_today"])
     
-    try:
-        today = date.today()
-        stats = await analytics.get_stats_by_date(today)
-        text = format_date_stats(stats)
-        
-        await message.answer(
-            text,
-            reply_markup=get_back_to_main_keyboard(),
-            parse_mode="HTML"
-        )
-    except Exception as e:
-        logger.error(f"Error getting today stats: {e}")
-        await message.answer("❌ Ошибка при получении статистики")
+    await message.answer(
+        text,
+        reply_markup=get_back_to_main_keyboard(),
+        parse_mode="HTML"
+    )
 
 
 @router.message(Command("stats_users"))
 async def cmd_stats_users(message: Message):
     """Handle /stats_users command - list of users."""
-    if message.from_user.id not in ADMIN_IDS:
-        await message.answer("❌ У вас нет доступа к этой команде")
-        return
+    users_data = await analytics.get_users_list(page=1, page_size=10)
+    text = format_users_list(users_data)
     
-    try:
-        users_data = await analytics.get_users_list(page=1, page_size=10)
-        text = format_users_list(users_data)
-        
-        await message.answer(
-            text,
-            reply_markup=get_users_pagination(
-                users_data['page'],
-                users_data['total_pages']
-            ),
-            parse_mode="HTML"
-        )
-    except Exception as e:
-        logger.error(f"Error getting users list: {e}")
-        await message.answer("❌ Ошибка при получении списка пользователей")
+    await message.answer(
+        text,
+        reply_markup=get_users_pagination(
+            users_data['page'],
+            users_data['total_pages']
+        ),
+        parse_mode="HTML"
+    )
 
 
 @router.message(Command("stats_events"))
 async def cmd_stats_events(message: Message):
     """Handle /stats_events command - events by type."""
-    if message.from_user.id not in ADMIN_IDS:
-        await message.answer("❌ У вас нет доступа к этой команде")
-        return
-    
     await message.answer(
-        "📋 <b>Статистика по типам событий</b>\n\nВыберите тип:",
+        _EVENTS_MENU_TEXT,
         reply_markup=get_events_menu(),
         parse_mode="HTML"
     )
@@ -141,629 +221,381 @@ async def cmd_stats_events(message: Message):
 # ==================== Callback Handlers ====================
 
 
-@router.callback_query(F.data == "admin_main")
 async def callback_admin_main(callback: CallbackQuery):
     """Return to main admin menu."""
-    text = "🔧 <b>Админ-панель</b>\n\n"
-    text += "Выберите действие:"
-    
-    await callback.message.edit_text(
-        text,
-        reply_markup=get_admin_main_menu(),
-        parse_mode="HTML"
-    )
-    await callback.answer()
+    ack = asyncio.create_task(callback.answer())
+    try:
+        await _edit_screen(
+            callback,
+            _ADMIN_MAIN_TEXT,
+            get_admin_main_menu()
+        )
+    finally:
+        await ack
 
 
-@router.callback_query(F.data == "admin_stats_main")
 async def callback_stats_main(callback: CallbackQuery):
     """Show main statistics."""
+    # Acknowledge the tap right away, overlapping it with the query and edit
+    ack = asyncio.create_task(callback.answer())
     try:
         stats = await analytics.get_main_stats()
         text = format_main_stats(stats)
         
-        await callback.message.edit_text(
+        await _edit_screen(
+            callback,
             text,
-            reply_markup=get_back_to_main_keyboard(),
-            parse_mode="HTML"
+            get_back_to_main_keyboard()
         )
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_stats_main: {e}")
-        await callback.answer("❌ Ошибка при получении статистики", show_alert=True)
+    finally:
+        await ack
 
 
-@router.callback_query(F.data == "admin_stats_today")
-async def callback_stats_today(callback: CallbackQuery):
-    """Show statistics for today."""
+async def callback_stats_period(callback: CallbackQuery):
+    """Show statistics for today, yesterday, the last week or the last month."""
+    # Acknowledge the tap right away, overlapping it with the query and edit
+    ack = asyncio.create_task(callback.answer())
     try:
-        today = date.today()
-        stats = await analytics.get_stats_by_date(today)
-        text = format_date_stats(stats)
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_back_to_main_keyboard(),
-            parse_mode="HTML"
-        )
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_stats_today: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
-
-
-@router.callback_query(F.data == "admin_stats_yesterday")
-async def callback_stats_yesterday(callback: CallbackQuery):
-    """Show statistics for yesterday."""
-    try:
-        yesterday = date.today() - timedelta(days=1)
-        stats = await analytics.get_stats_by_date(yesterday)
-        text = format_date_stats(stats)
+        text = await _period_stats_text(*_PERIODS[callback.data])
         
-        await callback.message.edit_text(
+        await _edit_screen(
+            callback,
             text,
-            reply_markup=get_back_to_main_keyboard(),
-            parse_mode="HTML"
+            get_back_to_main_keyboard()
         )
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_stats_yesterday: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
-
+    finally:
+        await ack
 
-@router.callback_query(F.data == "admin_stats_week")
-async def callback_stats_week(callback: CallbackQuery):
-    """Show statistics for the last week."""
-    try:
-        end_date = date.today()
-        start_date = end_date - timedelta(days=7)
-        stats = await analytics.get_stats_for_period(start_date, end_date)
-        text = format_period_stats(stats)
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_back_to_main_keyboard(),
-            parse_mode="HTML"
-        )
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_stats_week: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
-
-
-@router.callback_query(F.data == "admin_stats_month")
-async def callback_stats_month(callback: CallbackQuery):
-    """Show statistics for the last month."""
-    try:
-        end_date = date.today()
-        start_date = end_date - timedelta(days=30)
-        stats = await analytics.get_stats_for_period(start_date, end_date)
-        text = format_period_stats(stats)
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_back_to_main_keyboard(),
-            parse_mode="HTML"
-        )
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_stats_month: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
 
-
-@router.callback_query(F.data == "admin_events_menu")
 async def callback_events_menu(callback: CallbackQuery):
     """Show events type menu."""
-    await callback.message.edit_text(
-        "📋 <b>Статистика по типам событий</b>\n\nВыберите тип:",
-        reply_markup=get_events_menu(),
-        parse_mode="HTML"
-    )
-    await callback.answer()
+    ack = asyncio.create_task(callback.answer())
+    try:
+        await _edit_screen(
+            callback,
+            _EVENTS_MENU_TEXT,
+            get_events_menu()
+        )
+    finally:
+        await ack
 
 
-@router.callback_query(F.data.startswith("admin_event_"))
 async def callback_event_stats(callback: CallbackQuery):
     """Show statistics for specific event type."""
+    # Acknowledge the tap right away, overlapping it with the query and edit
+    ack = asyncio.create_task(callback.answer())
     try:
-        event_type = callback.data.replace("admin_event_", "")
+        event_type = callback.data.removeprefix("admin_event_")
         
         # Get today's stats for this event
         today = date.today()
         stats = await analytics.get_stats_by_date(today)
         
-        emoji = EventType.get_emoji(event_type)
-        count = stats.get(event_type, 0)
-        
-        text = f"{emoji} <b>Статистика: {event_type}</b>\n\n"
-        text += f"Сегодня: <b>{count}</b>\n"
+        text = _EVENT_STATS_TEXT.format_map({
+            "emoji": EventType.get_emoji(event_type),
+            "event_type": event_type,
+            "count": stats.get(event_type, 0),
+        })
         
-        await callback.message.edit_text(
+        await _edit_screen(
+            callback,
             text,
-            reply_markup=get_back_to_main_keyboard(),
-            parse_mode="HTML"
+            get_back_to_main_keyboard()
         )
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_event_stats: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
+    finally:
+        await ack
 
 
-@router.callback_query(F.data.startswith("admin_users_list:"))
 async def callback_users_list(callback: CallbackQuery):
     """Show paginated users list."""
+    # Acknowledge the tap right away, overlapping it with the query and edit
+    ack = asyncio.create_task(callback.answer())
     try:
-        page = int(callback.data.split(":")[1])
+        page = _tail_int(callback.data)
         users_data = await analytics.get_users_list(page=page, page_size=10)
         text = format_users_list(users_data)
         
-        await callback.message.edit_text(
+        await _edit_screen(
+            callback,
             text,
-            reply_markup=get_users_pagination(
+            get_users_pagination(
                 users_data['page'],
                 users_data['total_pages']
-            ),
-            parse_mode="HTML"
+            )
         )
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_users_list: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
+    finally:
+        await ack
 
 
-@router.callback_query(F.data == "admin_users_current")
 async def callback_users_current(callback: CallbackQuery):
     """Handle click on current page indicator."""
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_user_detail:"))
 async def callback_user_detail(callback: CallbackQuery):
     """Show detailed user information."""
-    try:
-        user_id = int(callback.data.split(":")[1])
-        user_data = await analytics.get_user_summary(user_id)
-        
-        if not user_data:
-            await callback.answer("❌ Пользователь не найден", show_alert=True)
-            return
-        
-        text = format_user_card(user_data)
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_user_detail_keyboard(user_id),
-            parse_mode="HTML"
-        )
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_user_detail: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
+    user_id = _tail_int(callback.data)
+    user_data = await analytics.get_user_summary(user_id)
+    
+    if not user_data:
+        await callback.answer("❌ Пользователь не найден", show_alert=True)
+        return
+    
+    _user_display_cache[user_id] = _user_display(user_id, user_data.get('username'))
+    text = format_user_card(user_data)
+    
+    await _edit_screen(
+        callback,
+        text,
+        get_user_detail_keyboard(user_id)
+    )
+    await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_user_history:"))
 async def callback_user_history(callback: CallbackQuery):
     """Show user event history."""
-    try:
-        user_id = int(callback.data.split(":")[1])
+    user_id = _tail_int(callback.data)
+    user_display = _user_display_cache.get(user_id)
+    if user_display is not None:
         events = await analytics.get_user_history(user_id, limit=20)
-        
-        user_data = await analytics.get_user_summary(user_id)
+    else:
+        # Independent queries, run concurrently on separate pool connections
+        events, user_data = await asyncio.gather(
+            analytics.get_user_history(user_id, limit=20),
+            analytics.get_user_summary(user_id)
+        )
         if not user_data:
             await callback.answer("❌ Пользователь не найден", show_alert=True)
             return
-        
-        username = user_data.get('username')
-        user_display = f"@{username}" if username else f"ID {user_id}"
-        
-        text = f"👤 <b>Пользователь:</b> {user_display}\n\n"
-        text += format_user_history(events)
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_user_detail_keyboard(user_id),
-            parse_mode="HTML"
-        )
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_user_history: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
+        user_display = _user_display(user_id, user_data.get('username'))
+        _user_display_cache[user_id] = user_display
+    
+    text = f"👤 <b>Пользователь:</b> {user_display}\n\n"
+    text += format_user_history(events)
+    
+    await _edit_screen(
+        callback,
+        text,
+        get_user_detail_keyboard(user_id)
+    )
+    await callback.answer()
 
 
-@router.callback_query(F.data == "admin_notifications")
 async def callback_notifications(callback: CallbackQuery):
     """Show notification settings."""
+    # Acknowledge the tap right away, overlapping it with the query and edit
+    ack = asyncio.create_task(callback.answer())
     try:
-        settings = await db.get_notification_settings(callback.from_user.id)
-        
-        text = "🔔 <b>Настройки уведомлений</b>\n\n"
-        text += "Выберите типы уведомлений, которые хотите получать:"
+        # Screen data is fetched in a task group so further parallel fetches
+        # (e.g. badge counts) are one create_task away
+        async with asyncio.TaskGroup() as tg:
+            settings_task = tg.create_task(db.get_notification_settings(callback.from_user.id))
         
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_notifications_settings_keyboard(settings),
-            parse_mode="HTML"
+        await _edit_screen(
+            callback,
+            _NOTIF_TEXT,
+            get_notifications_settings_keyboard(settings_task.result())
         )
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_notifications: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
+    finally:
+        await ack
 
 
-@router.callback_query(F.data == "admin_notif_toggle_new_users")
-async def callback_toggle_new_users(callback: CallbackQuery):
-    """Toggle new users notifications."""
-    try:
-        settings = await db.get_notification_settings(callback.from_user.id)
-        new_value = not settings.get('notify_new_users', True)
-        
-        await db.update_notification_settings(
-            callback.from_user.id,
-            notify_new_users=new_value
-        )
-        
-        settings['notify_new_users'] = new_value
-        
-        text = "🔔 <b>Настройки уведомлений</b>\n\n"
-        text += "Выберите типы уведомлений, которые хотите получать:"
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_notifications_settings_keyboard(settings),
-            parse_mode="HTML"
-        )
-        await callback.answer("✅ Настройка обновлена")
-    except Exception as e:
-        logger.error(f"Error in callback_toggle_new_users: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
-
-
-@router.callback_query(F.data == "admin_notif_toggle_orders")
-async def callback_toggle_orders(callback: CallbackQuery):
-    """Toggle order notifications."""
-    try:
-        settings = await db.get_notification_settings(callback.from_user.id)
-        new_value = not settings.get('notify_orders', True)
-        
-        await db.update_notification_settings(
-            callback.from_user.id,
-            notify_orders=new_value
-        )
-        
-        settings['notify_orders'] = new_value
-        
-        text = "🔔 <b>Настройки уведомлений</b>\n\n"
-        text += "Выберите типы уведомлений, которые хотите получать:"
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_notifications_settings_keyboard(settings),
-            parse_mode="HTML"
-        )
-        await callback.answer("✅ Настройка обновлена")
-    except Exception as e:
-        logger.error(f"Error in callback_toggle_orders: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
-
-
-@router.callback_query(F.data == "admin_notif_toggle_abandoned")
-async def callback_toggle_abandoned(callback: CallbackQuery):
-    """Toggle abandoned checkout notifications."""
-    try:
-        settings = await db.get_notification_settings(callback.from_user.id)
-        new_value = not settings.get('notify_abandoned_checkouts', True)
-        
-        await db.update_notification_settings(
-            callback.from_user.id,
-            notify_abandoned_checkouts=new_value
-        )
-        
-        settings['notify_abandoned_checkouts'] = new_value
-        
-        text = "🔔 <b>Настройки уведомлений</b>\n\n"
-        text += "Выберите типы уведомлений, которые хотите получать:"
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_notifications_settings_keyboard(settings),
-            parse_mode="HTML"
-        )
-        await callback.answer("✅ Настройка обновлена")
-    except Exception as e:
-        logger.error(f"Error in callback_toggle_abandoned: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
+async def callback_toggle_notification(callback: CallbackQuery):
+    """Toggle one notification flag, named by the payload after 'admin_notif_toggle:'."""
+    column = "notify_" + callback.data.partition(":")[2]
+    if column not in _NOTIF_TOGGLE_COLUMNS:
+        await callback.answer()
+        return
+    
+    settings = await db.toggle_notification_setting(callback.from_user.id, column)
+    
+    await _edit_screen(
+        callback,
+        _NOTIF_TEXT,
+        get_notifications_settings_keyboard(settings)
+    )
+    await callback.answer("✅ Настройка обновлена")
 
 
 # Broadcast handlers
-@router.callback_query(F.data == "admin_broadcast")
 async def callback_broadcast_menu(callback: CallbackQuery):
     """Show broadcast menu."""
-    if callback.from_user.id not in ADMIN_IDS:
-        await callback.answer("❌ Нет доступа", show_alert=True)
-        return
-    
-    try:
-        from keyboards.admin_keyboards import get_broadcast_menu_keyboard
-        
-        text = "📣 <b>Рассылка</b>\n\n"
-        text += "Здесь вы можете создать рассылку для всех пользователей бота.\n\n"
-        text += "Рассылка будет отправлена всем активным пользователям (не заблокировавшим бота)."
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_broadcast_menu_keyboard(),
-            parse_mode="HTML"
-        )
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_broadcast_menu: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
+    await _edit_screen(
+        callback,
+        _BROADCAST_MENU_TEXT,
+        get_broadcast_menu_keyboard()
+    )
+    await callback.answer()
 
 
 @router.callback_query(F.data == "broadcast_start")
 async def callback_broadcast_start(callback: CallbackQuery, state: FSMContext):
     """Start broadcast creation."""
-    if callback.from_user.id not in ADMIN_IDS:
-        await callback.answer("❌ Нет доступа", show_alert=True)
-        return
-    
-    try:
-        from keyboards.admin_keyboards import get_message_type_keyboard
-        from states import BroadcastStates
-        
-        text = "📝 <b>Создание рассылки</b>\n\n"
-        text += "Выберите тип сообщения:"
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_message_type_keyboard(),
-            parse_mode="HTML"
-        )
-        await state.set_state(BroadcastStates.waiting_for_message_type)
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_broadcast_start: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
+    await _edit_screen(
+        callback,
+        _BROADCAST_TYPE_TEXT,
+        get_message_type_keyboard()
+    )
+    await state.set_state(BroadcastStates.waiting_for_message_type)
+    await callback.answer()
 
 
 @router.callback_query(F.data == "broadcast_type_text")
 async def callback_broadcast_type_text(callback: CallbackQuery, state: FSMContext):
     """Choose text-only broadcast."""
-    if callback.from_user.id not in ADMIN_IDS:
-        await callback.answer("❌ Нет доступа", show_alert=True)
-        return
+    await state.update_data(broadcast_type="text")
     
-    try:
-        from keyboards.admin_keyboards import get_cancel_keyboard
-        from states import BroadcastStates
-        
-        await state.update_data(broadcast_type="text")
-        
-        text = "📝 <b>Текст рассылки</b>\n\n"
-        text += "Отправьте текст сообщения для рассылки:"
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_cancel_keyboard(),
-            parse_mode="HTML"
-        )
-        await state.set_state(BroadcastStates.waiting_for_text)
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_broadcast_type_text: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
+    await _edit_screen(
+        callback,
+        _BROADCAST_TEXT_PROMPT,
+        get_cancel_keyboard()
+    )
+    await state.set_state(BroadcastStates.waiting_for_text)
+    await callback.answer()
 
 
 @router.callback_query(F.data == "broadcast_type_photo")
 async def callback_broadcast_type_photo(callback: CallbackQuery, state: FSMContext):
     """Choose photo broadcast."""
-    if callback.from_user.id not in ADMIN_IDS:
-        await callback.answer("❌ Нет доступа", show_alert=True)
-        return
+    await state.update_data(broadcast_type="photo")
     
-    try:
-        from keyboards.admin_keyboards import get_cancel_keyboard
-        from states import BroadcastStates
-        
-        await state.update_data(broadcast_type="photo")
-        
-        text = "🖼 <b>Фото для рассылки</b>\n\n"
-        text += "Отправьте фото:"
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_cancel_keyboard(),
-            parse_mode="HTML"
-        )
-        await state.set_state(BroadcastStates.waiting_for_photo)
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_broadcast_type_photo: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
+    await _edit_screen(
+        callback,
+        _BROADCAST_PHOTO_PROMPT,
+        get_cancel_keyboard()
+    )
+    await state.set_state(BroadcastStates.waiting_for_photo)
+    await callback.answer()
 
 
 @router.message(BroadcastStates.waiting_for_text)
 async def handle_broadcast_text(message: Message, state: FSMContext):
     """Handle broadcast text input."""
-    if message.from_user.id not in ADMIN_IDS:
-        return
+    await state.update_data(broadcast_text=message.text)
     
-    try:
-        from keyboards.admin_keyboards import get_preview_keyboard
-        from states import BroadcastStates
-        
-        await state.update_data(broadcast_text=message.text)
-        
-        # Show preview
-        preview_text = "👁 <b>Предпросмотр рассылки</b>\n\n"
-        preview_text += "──────────────────────\n"
-        preview_text += message.text
-        preview_text += "\n──────────────────────\n\n"
-        preview_text += "Всё верно?"
-        
-        await message.answer(
-            preview_text,
-            reply_markup=get_preview_keyboard(),
-            parse_mode="HTML"
-        )
-        await state.set_state(BroadcastStates.confirm_broadcast)
-    except Exception as e:
-        logger.error(f"Error in handle_broadcast_text: {e}")
-        await message.answer("❌ Ошибка")
+    # Show preview
+    preview_text = (
+        "👁 <b>Предпросмотр рассылки</b>\n\n"
+        "──────────────────────\n"
+        f"{message.text}"
+        "\n──────────────────────\n\n"
+        "Всё верно?"
+    )
+    
+    await message.answer(
+        preview_text,
+        reply_markup=get_preview_keyboard(),
+        parse_mode="HTML"
+    )
+    await state.set_state(BroadcastStates.confirm_broadcast)
 
 
 @router.message(BroadcastStates.waiting_for_photo, F.photo)
 async def handle_broadcast_photo(message: Message, state: FSMContext):
     """Handle broadcast photo input."""
-    if message.from_user.id not in ADMIN_IDS:
-        return
+    # Save photo file_id
+    photo_file_id = message.photo[-1].file_id
+    await state.update_data(broadcast_photo=photo_file_id)
     
-    try:
-        from keyboards.admin_keyboards import get_cancel_keyboard
-        from states import BroadcastStates
-        
-        # Save photo file_id
-        photo_file_id = message.photo[-1].file_id
-        await state.update_data(broadcast_photo=photo_file_id)
-        
-        text = "📝 <b>Подпись к фото</b>\n\n"
-        text += "Отправьте текст, который будет под фото:"
-        
-        await message.answer(
-            text,
-            reply_markup=get_cancel_keyboard(),
-            parse_mode="HTML"
-        )
-        await state.set_state(BroadcastStates.waiting_for_caption)
-    except Exception as e:
-        logger.error(f"Error in handle_broadcast_photo: {e}")
-        await message.answer("❌ Ошибка")
+    await message.answer(
+        _BROADCAST_CAPTION_PROMPT,
+        reply_markup=get_cancel_keyboard(),
+        parse_mode="HTML"
+    )
+    await state.set_state(BroadcastStates.waiting_for_caption)
 
 
 @router.message(BroadcastStates.waiting_for_caption)
 async def handle_broadcast_caption(message: Message, state: FSMContext):
     """Handle broadcast caption input."""
-    if message.from_user.id not in ADMIN_IDS:
-        return
+    data = await state.get_data()
+    photo_file_id = data.get('broadcast_photo')
     
-    try:
-        from keyboards.admin_keyboards import get_preview_keyboard
-        from states import BroadcastStates
-        
-        data = await state.get_data()
-        photo_file_id = data.get('broadcast_photo')
-        
-        await state.update_data(broadcast_text=message.text)
-        
-        # Show preview
-        await message.answer_photo(
-            photo=photo_file_id,
-            caption=f"👁 <b>Предпросмотр рассылки</b>\n\n{message.text}\n\nВсё верно?",
-            reply_markup=get_preview_keyboard(),
-            parse_mode="HTML"
-        )
-        await state.set_state(BroadcastStates.confirm_broadcast)
-    except Exception as e:
-        logger.error(f"Error in handle_broadcast_caption: {e}")
-        await message.answer("❌ Ошибка")
+    await state.update_data(broadcast_text=message.text)
+    
+    # Show preview
+    await message.answer_photo(
+        photo=photo_file_id,
+        caption=f"👁 <b>Предпросмотр рассылки</b>\n\n{message.text}\n\nВсё верно?",
+        reply_markup=get_preview_keyboard(),
+        parse_mode="HTML"
+    )
+    await state.set_state(BroadcastStates.confirm_broadcast)
 
 
 @router.callback_query(F.data == "broadcast_confirm")
 async def callback_broadcast_confirm(callback: CallbackQuery, state: FSMContext, bot):
     """Confirm and execute broadcast."""
-    if callback.from_user.id not in ADMIN_IDS:
-        await callback.answer("❌ Нет доступа", show_alert=True)
-        return
-    
     try:
-        from services.broadcast_service import BroadcastService
-        
         data = await state.get_data()
         broadcast_text = data.get('broadcast_text')
         broadcast_photo = data.get('broadcast_photo')
         broadcast_type = data.get('broadcast_type')
         
-        # Delete preview message and send new status message
-        try:
-            await callback.message.delete()
-        except Exception:
-            pass
-        
-        status_msg = await callback.message.answer(
-            "📤 Начинаю рассылку...\nЭто может занять некоторое время.",
-            parse_mode="HTML"
+        # Independent Bot API calls: drop the preview, post the status message
+        # and acknowledge the tap all at once
+        _, status_msg, _ = await asyncio.gather(
+            _delete_quietly(callback.message),
+            callback.message.answer(
+                "📤 Начинаю рассылку...\nЭто может занять некоторое время.",
+                parse_mode="HTML"
+            ),
+            callback.answer()
         )
-        await callback.answer()
         
-        # Download photo if needed
-        photo_path = None
-        if broadcast_type == "photo" and broadcast_photo:
-            import tempfile
-            from pathlib import Path
-            
-            file = await bot.get_file(broadcast_photo)
-            temp_dir = Path(tempfile.gettempdir())
-            photo_path = temp_dir / f"broadcast_{broadcast_photo}.jpg"
-            await bot.download_file(file.file_path, photo_path)
+        # Telegram re-sends an already uploaded photo by its file_id, nothing to download
+        photo_file_id = broadcast_photo if broadcast_type == "photo" else None
         
         # Execute broadcast
         try:
-            broadcast_service = BroadcastService(db)
             stats = await broadcast_service.execute_broadcast(
                 bot=bot,
                 text=broadcast_text,
-                photo=str(photo_path) if photo_path else None
+                photo_file_id=photo_file_id
             )
         except RuntimeError as e:
             # Database pool not ready
-            logger.error(f"Database error during broadcast: {e}")
+            logger.error("Database error during broadcast: %s", e)
             await status_msg.edit_text(
                 "❌ Ошибка подключения к базе данных.\n"
                 "Попробуйте еще раз через несколько секунд.",
                 reply_markup=get_admin_main_menu()
             )
-            if photo_path and photo_path.exists():
-                photo_path.unlink()
             await state.clear()
             return
         except Exception as e:
-            logger.error(f"Error during broadcast execution: {e}")
+            # Shown to the admin verbatim, so any failure of the run is caught here
+            logger.exception("Error during broadcast execution")
             await status_msg.edit_text(
                 f"❌ Ошибка при выполнении рассылки: {e}",
                 reply_markup=get_admin_main_menu()
             )
-            if photo_path and photo_path.exists():
-                photo_path.unlink()
             await state.clear()
             return
         
         # Show results
-        result_text = "✅ <b>Рассылка завершена!</b>\n\n"
-        result_text += f"📊 Статистика:\n"
-        result_text += f"• Всего пользователей: {stats['total']}\n"
-        result_text += f"• Успешно отправлено: {stats['success']}\n"
-        result_text += f"• Заблокировали бота: {stats['blocked']}\n"
-        result_text += f"• Ошибки: {stats['failed']}\n"
+        result_text = (
+            "✅ <b>Рассылка завершена!</b>\n\n"
+            "📊 Статистика:\n"
+            f"• Всего пользователей: {stats['total']}\n"
+            f"• Успешно отправлено: {stats['success']}\n"
+            f"• Заблокировали бота: {stats['blocked']}\n"
+            f"• Ошибки: {stats['failed']}\n"
+        )
         
         # Delete status message and send result
-        try:
-            await status_msg.delete()
-        except Exception:
-            pass
-        
-        await callback.message.answer(
-            result_text,
-            reply_markup=get_admin_main_menu(),
-            parse_mode="HTML"
+        await asyncio.gather(
+            _delete_quietly(status_msg),
+            callback.message.answer(
+                result_text,
+                reply_markup=get_admin_main_menu(),
+                parse_mode="HTML"
+            )
         )
         
-        # Clean up
-        if photo_path and photo_path.exists():
-            photo_path.unlink()
-        
         await state.clear()
-    except Exception as e:
-        logger.error(f"Error in callback_broadcast_confirm: {e}")
+    except _HANDLER_ERRORS:
+        logger.exception("Error in callback_broadcast_confirm")
         await callback.message.answer("❌ Ошибка при выполнении рассылки")
         await state.clear()
 
@@ -771,231 +603,220 @@ async def callback_broadcast_confirm(callback: CallbackQuery, state: FSMContext,
 @router.callback_query(F.data == "broadcast_cancel")
 async def callback_broadcast_cancel(callback: CallbackQuery, state: FSMContext):
     """Cancel broadcast creation."""
-    try:
-        await state.clear()
-        
-        text = "❌ Рассылка отменена"
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_admin_main_menu(),
-            parse_mode="HTML"
-        )
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_broadcast_cancel: {e}")
-        await callback.answer("❌ Ошибка", show_alert=True)
+    await state.clear()
+    
+    text = "❌ Рассылка отменена"
+    
+    await _edit_screen(
+        callback,
+        text,
+        get_admin_main_menu()
+    )
+    await callback.answer()
 
 
 @router.callback_query(F.data == "broadcast_edit_text")
 async def callback_broadcast_edit_text(callback: CallbackQuery, state: FSMContext):
     """Edit broadcast text."""
-    if callback.from_user.id not in ADMIN_IDS:
-        await callback.answer("❌ Нет доступа", show_alert=True)
-        return
+    await _edit_screen(
+        callback,
+        _BROADCAST_EDIT_PROMPT,
+        get_cancel_keyboard()
+    )
     
-    try:
-        from keyboards.admin_keyboards import get_cancel_keyboard
-        from states import BroadcastStates
-        
-        text = "📝 <b>Новый текст рассылки</b>\n\n"
-        text += "Отправьте новый текст сообщения:"
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_cancel_keyboard(),
-            parse_mode="HTML"
-        )
-        
-        data = await state.get_data()
-        if data.get('broadcast_type') == 'photo':
-            await state.set_state(BroadcastStates.waiting_for_caption)
-        else:
-            await state.set_state(BroadcastStates.waiting_for_text)
-        
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_broadcast_edit_text: {e}")
+    data = await state.get_data()
+    if data.get('broadcast_type') == 'photo':
+        await state.set_state(BroadcastStates.waiting_for_caption)
+    else:
+        await state.set_state(BroadcastStates.waiting_for_text)
+    
+    await callback.answer()
 
 
-@router.callback_query(F.data == "admin_settings")
 async def callback_settings_menu(callback: CallbackQuery):
     """Show system settings menu."""
-    try:
-        if callback.from_user.id not in ADMIN_IDS:
-            await callback.answer("❌ У вас нет доступа", show_alert=True)
-            return
-        
-        # Get current settings from database
-        reminder_interval = await db.get_system_setting('reminder_check_interval', '1')
-        reminder_delay = await db.get_system_setting('reminder_delay_minutes', '15')
-        reminder_enabled = await db.get_system_setting('reminder_enabled', 'true')
-        
-        text = "⚙️ <b>Настройки системы</b>\n\n"
-        text += "📊 <b>Текущие настройки напоминаний:</b>\n"
-        text += f"• Интервал проверки: {reminder_interval} мин\n"
-        text += f"• Задержка отправки: {reminder_delay} мин\n"
-        text += f"• Статус: {'✅ Включено' if reminder_enabled == 'true' else '❌ Выключено'}\n\n"
-        text += "Выберите параметр для изменения:"
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_settings_menu(),
-            parse_mode="HTML"
-        )
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_settings_menu: {e}")
-        await callback.answer("Ошибка при загрузке настроек", show_alert=True)
+    # Get current settings from database
+    values = await db.get_system_settings(
+        ['reminder_check_interval', 'reminder_delay_minutes', 'reminder_enabled']
+    )
+    reminder_interval = values.get('reminder_check_interval', '1')
+    reminder_delay = values.get('reminder_delay_minutes', '15')
+    reminder_enabled = values.get('reminder_enabled', 'true')
+    
+    text = (
+        "⚙️ <b>Настройки системы</b>\n\n"
+        "📊 <b>Текущие настройки напоминаний:</b>\n"
+        f"• Интервал проверки: {reminder_interval} мин\n"
+        f"• Задержка отправки: {reminder_delay} мин\n"
+        f"• Статус: {'✅ Включено' if reminder_enabled == 'true' else '❌ Выключено'}\n\n"
+        "Выберите параметр для изменения:"
+    )
+    
+    await _edit_screen(
+        callback,
+        text,
+        get_settings_menu()
+    )
+    await callback.answer()
 
 
 @router.callback_query(F.data == "settings_reminder_interval")
 async def callback_set_reminder_interval(callback: CallbackQuery, state: FSMContext):
     """Start process to set reminder check interval."""
-    try:
-        if callback.from_user.id not in ADMIN_IDS:
-            await callback.answer("❌ У вас нет доступа", show_alert=True)
-            return
-        
-        current = await db.get_system_setting('reminder_check_interval', '1')
-        
-        text = "⏱ <b>Настройка интервала проверки напоминаний</b>\n\n"
-        text += f"Текущее значение: <b>{current} мин</b>\n\n"
-        text += "Это интервал, с которым бот проверяет базу данных на наличие "
-        text += "пользователей, которым нужно отправить напоминание.\n\n"
-        text += "⚠️ <b>Важно:</b> Меньший интервал = более быстрая отправка, "
-        text += "но больше нагрузка на сервер.\n\n"
-        text += "Введите новое значение в минутах (1-60):"
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_settings_back_keyboard(),
-            parse_mode="HTML"
-        )
-        await state.set_state(SettingsStates.waiting_for_reminder_interval)
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_set_reminder_interval: {e}")
-        await callback.answer("Ошибка", show_alert=True)
+    current = await db.get_system_setting('reminder_check_interval', '1')
+    
+    text = (
+        "⏱ <b>Настройка интервала проверки напоминаний</b>\n\n"
+        f"Текущее значение: <b>{current} мин</b>\n\n"
+        "Это интервал, с которым бот проверяет базу данных на наличие "
+        "пользователей, которым нужно отправить напоминание.\n\n"
+        "⚠️ <b>Важно:</b> Меньший интервал = более быстрая отправка, "
+        "но больше нагрузка на сервер.\n\n"
+        "Введите новое значение в минутах (1-60):"
+    )
+    
+    await _edit_screen(
+        callback,
+        text,
+        get_settings_back_keyboard()
+    )
+    await state.set_state(SettingsStates.waiting_for_reminder_interval)
+    await callback.answer()
 
 
 @router.message(SettingsStates.waiting_for_reminder_interval)
 async def process_reminder_interval(message: Message, state: FSMContext):
     """Process new reminder check interval value."""
+    # Validate input
     try:
-        if message.from_user.id not in ADMIN_IDS:
-            return
-        
-        # Validate input
-        try:
-            interval = int(message.text)
-            if interval < 1 or interval > 60:
-                await message.answer(
-                    "❌ Неверное значение. Введите число от 1 до 60:",
-                    reply_markup=get_settings_back_keyboard()
-                )
-                return
-        except ValueError:
+        interval = int(message.text)
+        if interval < 1 or interval > 60:
             await message.answer(
-                "❌ Пожалуйста, введите целое число:",
+                "❌ Неверное значение. Введите число от 1 до 60:",
                 reply_markup=get_settings_back_keyboard()
             )
             return
-        
-        # Save to database
-        await db.set_system_setting('reminder_check_interval', str(interval), message.from_user.id)
-        
-        # Sync to .env file
-        from services.config_sync import ConfigSyncService
-        config_sync = ConfigSyncService(db)
-        await config_sync.sync_to_env('reminder_check_interval', str(interval))
-        
-        await state.clear()
-        
-        text = f"✅ Интервал проверки напоминаний обновлен: <b>{interval} мин</b>\n\n"
-        text += "🔄 Изменения применятся автоматически в течение 10 секунд!\n"
-        text += "📝 Файл .env также обновлен"
-        
+    except ValueError:
         await message.answer(
-            text,
-            reply_markup=get_settings_menu(),
-            parse_mode="HTML"
+            "❌ Пожалуйста, введите целое число:",
+            reply_markup=get_settings_back_keyboard()
         )
-    except Exception as e:
-        logger.error(f"Error in process_reminder_interval: {e}")
-        await message.answer("Ошибка при сохранении настроек")
+        return
+    
+    # Save to database and sync to .env file at the same time
+    await asyncio.gather(
+        db.set_system_setting('reminder_check_interval', str(interval), message.from_user.id),
+        config_sync.sync_to_env('reminder_check_interval', str(interval))
+    )
+    # Reschedule the reminder loop with the new interval right away
+    config_sync.settings_changed.set()
+    
+    await state.clear()
+    
+    text = (
+        f"✅ Интервал проверки напоминаний обновлен: <b>{interval} мин</b>\n\n"
+        "🔄 Изменения применятся сразу!\n"
+        "📝 Файл .env также обновлен"
+    )
+    
+    await message.answer(
+        text,
+        reply_markup=get_settings_menu(),
+        parse_mode="HTML"
+    )
 
 
 @router.callback_query(F.data == "settings_reminder_delay")
 async def callback_set_reminder_delay(callback: CallbackQuery, state: FSMContext):
     """Start process to set reminder delay."""
-    try:
-        if callback.from_user.id not in ADMIN_IDS:
-            await callback.answer("❌ У вас нет доступа", show_alert=True)
-            return
-        
-        current = await db.get_system_setting('reminder_delay_minutes', '15')
-        
-        text = "⏰ <b>Настройка задержки отправки напоминания</b>\n\n"
-        text += f"Текущее значение: <b>{current} мин</b>\n\n"
-        text += "Это время, которое должно пройти после оценки username, "
-        text += "прежде чем пользователю будет отправлено напоминание.\n\n"
-        text += "Введите новое значение в минутах (1-1440):"
-        
-        await callback.message.edit_text(
-            text,
-            reply_markup=get_settings_back_keyboard(),
-            parse_mode="HTML"
-        )
-        await state.set_state(SettingsStates.waiting_for_reminder_delay)
-        await callback.answer()
-    except Exception as e:
-        logger.error(f"Error in callback_set_reminder_delay: {e}")
-        await callback.answer("Ошибка", show_alert=True)
+    current = await db.get_system_setting('reminder_delay_minutes', '15')
+    
+    text = (
+        "⏰ <b>Настройка задержки отправки напоминания</b>\n\n"
+        f"Текущее значение: <b>{current} мин</b>\n\n"
+        "Это время, которое должно пройти после оценки username, "
+        "прежде чем пользователю будет отправлено напоминание.\n\n"
+        "Введите новое значение в минутах (1-1440):"
+    )
+    
+    await _edit_screen(
+        callback,
+        text,
+        get_settings_back_keyboard()
+    )
+    await state.set_state(SettingsStates.waiting_for_reminder_delay)
+    await callback.answer()
 
 
 @router.message(SettingsStates.waiting_for_reminder_delay)
 async def process_reminder_delay(message: Message, state: FSMContext):
     """Process new reminder delay value."""
+    # Validate input
     try:
-        if message.from_user.id not in ADMIN_IDS:
-            return
-        
-        # Validate input
-        try:
-            delay = int(message.text)
-            if delay < 1 or delay > 1440:
-                await message.answer(
-                    "❌ Неверное значение. Введите число от 1 до 1440 (24 часа):",
-                    reply_markup=get_settings_back_keyboard()
-                )
-                return
-        except ValueError:
+        delay = int(message.text)
+        if delay < 1 or delay > 1440:
             await message.answer(
-                "❌ Пожалуйста, введите целое число:",
+                "❌ Неверное значение. Введите число от 1 до 1440 (24 часа):",
                 reply_markup=get_settings_back_keyboard()
             )
             return
-        
-        # Save to database
-        await db.set_system_setting('reminder_delay_minutes', str(delay), message.from_user.id)
-        
-        # Sync to .env file
-        from services.config_sync import ConfigSyncService
-        config_sync = ConfigSyncService(db)
-        await config_sync.sync_to_env('reminder_delay_minutes', str(delay))
-        
-        await state.clear()
-        
-        text = f"✅ Задержка отправки напоминаний обновлена: <b>{delay} мин</b>\n\n"
-        text += "📝 Файл .env также обновлен"
-        
+    except ValueError:
         await message.answer(
-            text,
-            reply_markup=get_settings_menu(),
-            parse_mode="HTML"
+            "❌ Пожалуйста, введите целое число:",
+            reply_markup=get_settings_back_keyboard()
         )
-    except Exception as e:
-        logger.error(f"Error in process_reminder_delay: {e}")
-        await message.answer("Ошибка при сохранении настроек")
-        await callback.answer("❌ Ошибка", show_alert=True)
+        return
+    
+    # Save to database and sync to .env file at the same time
+    await asyncio.gather(
+        db.set_system_setting('reminder_delay_minutes', str(delay), message.from_user.id),
+        config_sync.sync_to_env('reminder_delay_minutes', str(delay))
+    )
+    
+    await state.clear()
+    
+    text = (
+        f"✅ Задержка отправки напоминаний обновлена: <b>{delay} мин</b>\n\n"
+        "📝 Файл .env также обновлен"
+    )
+    
+    await message.answer(
+        text,
+        reply_markup=get_settings_menu(),
+        parse_mode="HTML"
+    )
+
+
+# ==================== Admin Callback Routing ====================
+
+# admin_* callback payload (up to the first ':') -> screen handler; one hash probe
+# per update instead of a filter check for every registered admin handler
+_ADMIN_ROUTES = {
+    "admin_main": callback_admin_main,
+    "admin_stats_main": callback_stats_main,
+    **dict.fromkeys(_PERIODS, callback_stats_period),
+    "admin_events_menu": callback_events_menu,
+    **{f"admin_event_{event_type}": callback_event_stats for event_type in EventType.all_types()},
+    "admin_users_list": callback_users_list,
+    "admin_users_current": callback_users_current,
+    "admin_user_detail": callback_user_detail,
+    "admin_user_history": callback_user_history,
+    "admin_notifications": callback_notifications,
+    "admin_notif_toggle": callback_toggle_notification,
+    "admin_broadcast": callback_broadcast_menu,
+    "admin_settings": callback_settings_menu,
+}
+
+
+def _admin_route(callback: CallbackQuery):
+    """Filter matching routed admin callbacks; passes the resolved handler as ``route``."""
+    if not callback.data:
+        return False
+    route = _ADMIN_ROUTES.get(callback.data.partition(":")[0])
+    return {"route": route} if route is not None else False
+
+
+@router.callback_query(_admin_route)
+async def callback_admin_dispatch(callback: CallbackQuery, route: Callable[[CallbackQuery], Awaitable[None]]):
+    """Dispatch an admin_* callback to its screen handler."""
+    await route(callback)
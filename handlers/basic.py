@@ -1,5 +1,4 @@
-import json
-from pathlib import Path
+from typing import Awaitable, Callable
 
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
@@ -10,39 +9,18 @@ from aiogram.enums import ParseMode
 from database.db import db
 from states import BotStates
 from keyboards.builders import get_lang_kb, get_main_menu, get_sell_kb, get_channel_kb
-from config import CHANNEL_URL
+from config import settings
 from handlers.valuation import evaluate_username
 from services.event_logger import EventLogger
+from locales import ALL_TEXTS, get_texts
 
 
 router = Router()
 
-LOCALES_DIR = Path(__file__).parent.parent / "locales"
-
 # Initialize event logger
 event_logger = EventLogger(db)
 
 
-def load_texts(lang: str) -> dict:
-    """Load localization texts for specified language."""
-    file_path = LOCALES_DIR / f"{lang}.json"
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-# Load all languages for button text matching
-ALL_TEXTS = {
-    "en": load_texts("en"),
-    "ru": load_texts("ru"),
-    "es": load_texts("es"),
-}
-
-
-def get_all_button_texts(key: str) -> list[str]:
-    """Get button text in all languages for filtering."""
-    return [ALL_TEXTS[lang][key] for lang in ALL_TEXTS]
-
-
 @router.message(CommandStart())
 async def cmd_start(message: Message):
     """Handle /start command."""
@@ -61,7 +39,7 @@ async def cmd_start(message: Message):
     else:
         await event_logger.log_first_start(user_id, username)
     
-    texts = load_texts("en")
+    texts = get_texts("en")
     await message.answer(
         texts["welcome"],
         reply_markup=get_lang_kb()
@@ -72,9 +50,9 @@ async def cmd_start(message: Message):
 async def process_language(callback: CallbackQuery, state: FSMContext):
     """Handle language selection."""
     lang = callback.data.split("_")[1]  # lang_en -> en
-    await db.set_language(callback.from_user.id, lang)
+    await db.upsert_user(callback.from_user.id, lang)
     
-    texts = load_texts(lang)
+    texts = get_texts(lang)
     await state.update_data(lang=lang)
     
     await callback.message.answer(
@@ -86,41 +64,37 @@ async def process_language(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
-@router.message(F.text.in_(get_all_button_texts("btn_lang")))
-async def btn_change_language(message: Message):
+async def btn_change_language(message: Message, state: FSMContext):
     """Handle 'Change language' button."""
     lang = await db.get_language(message.from_user.id)
-    texts = load_texts(lang)
+    texts = get_texts(lang)
     await message.answer(
         texts["welcome"],
         reply_markup=get_lang_kb()
     )
 
 
-@router.message(F.text.in_(get_all_button_texts("btn_method")))
-async def btn_methodology(message: Message):
+async def btn_methodology(message: Message, state: FSMContext):
     """Handle 'Valuation methodology' button."""
     lang = await db.get_language(message.from_user.id)
-    texts = load_texts(lang)
+    texts = get_texts(lang)
     await message.answer(texts["methodology"])
 
 
-@router.message(F.text.in_(get_all_button_texts("btn_sell")))
-async def btn_sell(message: Message):
+async def btn_sell(message: Message, state: FSMContext):
     """Handle 'Sell your handle' button."""
     lang = await db.get_language(message.from_user.id)
-    texts = load_texts(lang)
+    texts = get_texts(lang)
     await message.answer(
         texts["sell_info"].format(username="your handle"),
         reply_markup=get_sell_kb(texts)
     )
 
 
-@router.message(F.text.in_(get_all_button_texts("btn_evaluate")))
 async def btn_evaluate(message: Message, state: FSMContext):
     """Handle 'Evaluate a handle' button - evaluate user's own username."""
     lang = await db.get_language(message.from_user.id)
-    texts = load_texts(lang)
+    texts = get_texts(lang)
     
     # Получаем username пользователя
     user_username = message.from_user.username
@@ -135,17 +109,16 @@ async def btn_evaluate(message: Message, state: FSMContext):
     await evaluate_username(user_username, message, state, lang, texts)
 
 
-@router.message(F.text.in_(get_all_button_texts("btn_channel")))
-async def btn_channel(message: Message):
+async def btn_channel(message: Message, state: FSMContext):
     """Handle 'Channel' button - send channel link."""
     lang = await db.get_language(message.from_user.id)
-    texts = load_texts(lang)
+    texts = get_texts(lang)
     
     # Log event
     await event_logger.log_event(
         message.from_user.id,
         'go_to_group',
-        {'group_url': CHANNEL_URL},
+        {'group_url': settings.CHANNEL_URL},
         message.from_user.username
     )
     
@@ -153,3 +126,33 @@ async def btn_channel(message: Message):
         texts["channel_info"],
         reply_markup=get_channel_kb(texts)
     )
+
+
+# Main menu button text in any language -> handler; one dict probe per text message
+_BUTTON_ROUTES = {
+    ALL_TEXTS[lang][key]: handler
+    for lang in ALL_TEXTS
+    for key, handler in (
+        ("btn_lang", btn_change_language),
+        ("btn_method", btn_methodology),
+        ("btn_sell", btn_sell),
+        ("btn_evaluate", btn_evaluate),
+        ("btn_channel", btn_channel),
+    )
+}
+
+
+def _button_route(message: Message):
+    """Filter matching main menu buttons; passes the resolved handler as ``route``."""
+    route = _BUTTON_ROUTES.get(message.text)
+    return {"route": route} if route is not None else False
+
+
+@router.message(_button_route)
+async def btn_dispatch(
+    message: Message,
+    state: FSMContext,
+    route: Callable[[Message, FSMContext], Awaitable[None]]
+):
+    """Dispatch a main menu button press to its handler."""
+    await route(message, state)
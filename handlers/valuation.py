@@ -1,7 +1,5 @@
 import asyncio
-import json
 import re
-from pathlib import Path
 
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
@@ -12,29 +10,31 @@ from database.db import db
 from states import BotStates
 from services.logic import get_valuation_data, check_username_exists
 from services.event_logger import EventLogger
-from keyboards.builders import get_valuation_kb, get_sell_kb, get_main_menu
+from keyboards.builders import get_valuation_kb, get_sell_kb, get_main_menu, get_valuation_result_keyboard
+from config import settings
+from locales import get_texts
 
 
 router = Router()
 
-LOCALES_DIR = Path(__file__).parent.parent / "locales"
-
 # Initialize event logger
 event_logger = EventLogger(db)
 
 
-def load_texts(lang: str) -> dict:
-    """Load localization texts for specified language."""
-    file_path = LOCALES_DIR / f"{lang}.json"
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+# Telegram: 5-32 символов, начинается с буквы, только a-z, 0-9, _
+USERNAME_RE = re.compile(r'^@?[a-zA-Z][a-zA-Z0-9_]{3,31}$')
 
 
 def is_valid_username(text: str) -> bool:
     """Validate Telegram username format."""
-    # Telegram: 5-32 символов, начинается с буквы, только a-z, 0-9, _
-    pattern = r'^@?[a-zA-Z][a-zA-Z0-9_]{3,31}$'
-    return bool(re.match(pattern, text))
+    return USERNAME_RE.match(text) is not None
+
+
+async def _compute_valuation(username: str) -> dict:
+    """Get fresh valuation data for a username and save it to cache."""
+    data = get_valuation_data(username)
+    await db.save_valuation(data)
+    return data
 
 
 async def evaluate_username(username: str, message: Message, state: FSMContext, lang: str, texts: dict):
@@ -53,38 +53,24 @@ async def evaluate_username(username: str, message: Message, state: FSMContext,
         parse_mode=ParseMode.HTML
     )
     
-    # Check if username actually exists on Telegram
-    exists = await check_username_exists(username)
+    # Check if username actually exists on Telegram, looking up a cached
+    # valuation at the same time; the lookup is simply dropped if it doesn't
+    exists, cached_data = await asyncio.gather(
+        check_username_exists(username),
+        db.get_valuation(username)
+    )
     
     if not exists:
         await eval_msg.edit_text(texts["error_not_found"].format(username=username))
         return
     
-    # Check if we have cached valuation
-    cached_data = await db.get_valuation(username)
-    
     if cached_data:
         data = cached_data
     else:
-        # Simulate additional analysis delay
-        await asyncio.sleep(3)
-        
-        # Get valuation data and save to cache
-        data = get_valuation_data(username)
-        await db.save_valuation(data)
+        data = await _compute_valuation(username)
     
     # Format result
-    result = texts["result_template"].format(
-        username=data["username"],
-        structure=data["structure"],
-        category=data["category"],
-        rarity=data["rarity"],
-        demand=data["demand"],
-        score=data["score"],
-        branding=data["branding"],
-        price_low=data["price_low"],
-        price_high=data["price_high"]
-    )
+    result = texts["result_template"].format_map(data)
     
     # Add valuation instructions with the evaluated username
     result += "\n\n" + texts["valuation_instructions"].format(username=username)
@@ -92,38 +78,29 @@ async def evaluate_username(username: str, message: Message, state: FSMContext,
     # Save current username to state for sell_current callback
     await state.update_data(last_username=username)
     
-    # Log nickname check event
-    from services.event_logger import EventLogger
-    event_logger = EventLogger(db)
-    user_username = message.from_user.username
+    # Log nickname check event; the event only goes onto the flusher queue
     metadata = {'nickname': username}
     if data:
         metadata['price_low'] = data["price_low"]
         metadata['price_high'] = data["price_high"]
-    await event_logger.log_event(
-        message.from_user.id,
-        'check_nickname',
-        metadata,
-        user_username
-    )
+    await event_logger.log_event(message.from_user.id, 'check_nickname', metadata)
     
-    # Create valuation record in database
+    # Create valuation record in database, refreshing the user's username in
+    # the same statement instead of a separate update_user_info round trip
     estimated_price = f"${data['price_low']} - ${data['price_high']}"
     await db.create_valuation(
         user_id=message.from_user.id,
         username_checked=username,
-        estimated_price=estimated_price
+        estimated_price=estimated_price,
+        username=message.from_user.username
     )
     
     # Use new valuation result keyboard
-    from keyboards.builders import get_valuation_result_keyboard
-    from config import MANAGER_LINK, CHANNEL_URL, SHOW_GROUP_BUTTON
-    
     keyboard = get_valuation_result_keyboard(
-        manager_link=MANAGER_LINK,
-        channel_url=CHANNEL_URL,
+        manager_link=settings.MANAGER_LINK,
+        channel_url=settings.CHANNEL_URL,
         texts=texts,
-        show_group_button=SHOW_GROUP_BUTTON
+        show_group_button=settings.SHOW_GROUP_BUTTON
     )
     
     await message.answer(
@@ -137,7 +114,7 @@ async def evaluate_username(username: str, message: Message, state: FSMContext,
 async def process_username(message: Message, state: FSMContext):
     """Process username input for valuation."""
     lang = await db.get_language(message.from_user.id)
-    texts = load_texts(lang)
+    texts = get_texts(lang)
     
     username = message.text.strip()
     await evaluate_username(username, message, state, lang, texts)
@@ -147,7 +124,7 @@ async def process_username(message: Message, state: FSMContext):
 async def callback_eval_again(callback: CallbackQuery, state: FSMContext):
     """Handle 'Get another valuation' button."""
     lang = await db.get_language(callback.from_user.id)
-    texts = load_texts(lang)
+    texts = get_texts(lang)
     
     await callback.message.answer(texts["lang_set"], parse_mode=ParseMode.HTML)
     await state.set_state(BotStates.waiting_for_username)
@@ -158,7 +135,7 @@ async def callback_eval_again(callback: CallbackQuery, state: FSMContext):
 async def callback_sell_current(callback: CallbackQuery, state: FSMContext):
     """Handle 'Sell this handle' button."""
     lang = await db.get_language(callback.from_user.id)
-    texts = load_texts(lang)
+    texts = get_texts(lang)
     
     data = await state.get_data()
     username = data.get("last_username", "your handle")
@@ -1,8 +1,16 @@
-"""Admin keyboards for statistics panel."""
+"""Admin keyboards for statistics panel.
+
+Keyboards that take no arguments never change, so they are built once and
+the same markup object is reused on every update. Keyboards parameterized by
+small integers are kept in a bounded LRU keyed by their arguments.
+"""
+from functools import cache, lru_cache
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 
+@cache
 def get_admin_main_menu() -> InlineKeyboardMarkup:
     """Get main admin menu keyboard."""
     builder = InlineKeyboardBuilder()
@@ -35,6 +43,7 @@ def get_admin_main_menu() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cache
 def get_period_menu() -> InlineKeyboardMarkup:
     """Get period selection keyboard."""
     builder = InlineKeyboardBuilder()
@@ -54,6 +63,7 @@ def get_period_menu() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cache
 def get_events_menu() -> InlineKeyboardMarkup:
     """Get event types menu keyboard."""
     builder = InlineKeyboardBuilder()
@@ -89,6 +99,7 @@ def get_events_menu() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@lru_cache(maxsize=512)
 def get_users_pagination(page: int, total_pages: int) -> InlineKeyboardMarkup:
     """
     Get pagination keyboard for users list.
@@ -123,6 +134,7 @@ def get_users_pagination(page: int, total_pages: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@lru_cache(maxsize=512)
 def get_user_detail_keyboard(user_id: int) -> InlineKeyboardMarkup:
     """Get keyboard for user detail view."""
     builder = InlineKeyboardBuilder()
@@ -154,7 +166,7 @@ def get_notifications_settings_keyboard(settings: dict) -> InlineKeyboardMarkup:
     builder.row(
         InlineKeyboardButton(
             text=f"{new_users_status} Новые пользователи",
-            callback_data="admin_notif_toggle_new_users"
+            callback_data="admin_notif_toggle:new_users"
         )
     )
     
@@ -163,7 +175,7 @@ def get_notifications_settings_keyboard(settings: dict) -> InlineKeyboardMarkup:
     builder.row(
         InlineKeyboardButton(
             text=f"{orders_status} Заказы",
-            callback_data="admin_notif_toggle_orders"
+            callback_data="admin_notif_toggle:orders"
         )
     )
     
@@ -172,7 +184,7 @@ def get_notifications_settings_keyboard(settings: dict) -> InlineKeyboardMarkup:
     builder.row(
         InlineKeyboardButton(
             text=f"{abandoned_status} Брошенные оформления",
-            callback_data="admin_notif_toggle_abandoned"
+            callback_data="admin_notif_toggle:abandoned_checkouts"
         )
     )
     
@@ -192,6 +204,7 @@ def get_notifications_settings_keyboard(settings: dict) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cache
 def get_back_to_main_keyboard() -> InlineKeyboardMarkup:
     """Get simple back to main menu keyboard."""
     builder = InlineKeyboardBuilder()
@@ -201,6 +214,7 @@ def get_back_to_main_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cache
 def get_broadcast_menu_keyboard() -> InlineKeyboardMarkup:
     """Get broadcast main menu keyboard."""
     builder = InlineKeyboardBuilder()
@@ -215,6 +229,7 @@ def get_broadcast_menu_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cache
 def get_message_type_keyboard() -> InlineKeyboardMarkup:
     """Get message type selection keyboard."""
     builder = InlineKeyboardBuilder()
@@ -232,6 +247,7 @@ def get_message_type_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cache
 def get_preview_keyboard() -> InlineKeyboardMarkup:
     """Get broadcast preview confirmation keyboard."""
     builder = InlineKeyboardBuilder()
@@ -249,6 +265,7 @@ def get_preview_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cache
 def get_cancel_keyboard() -> InlineKeyboardMarkup:
     """Get simple cancel keyboard."""
     builder = InlineKeyboardBuilder()
@@ -258,6 +275,7 @@ def get_cancel_keyboard() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cache
 def get_settings_menu() -> InlineKeyboardMarkup:
     """Get system settings menu keyboard."""
     builder = InlineKeyboardBuilder()
@@ -275,6 +293,7 @@ def get_settings_menu() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@cache
 def get_settings_back_keyboard() -> InlineKeyboardMarkup:
     """Get back to settings keyboard."""
     builder = InlineKeyboardBuilder()
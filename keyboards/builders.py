@@ -1,3 +1,11 @@
+"""User-facing keyboards.
+
+Keyboards only vary by locale (and process-wide settings), so each one is built
+once per language and the same markup object is reused on every update.
+"""
+from functools import cache, wraps
+from typing import Callable, TypeVar
+
 from aiogram.types import (
     InlineKeyboardMarkup, 
     InlineKeyboardButton,
@@ -5,9 +13,28 @@ from aiogram.types import (
     KeyboardButton
 )
 
-from config import ADMIN_USERNAME, CHANNEL_URL
+from config import settings
+
+
+_Markup = TypeVar("_Markup", InlineKeyboardMarkup, ReplyKeyboardMarkup)
+
+
+def _per_language(builder: Callable[[dict], _Markup]) -> Callable[[dict], _Markup]:
+    """Cache a texts-only keyboard builder per locale, keyed by the locale's btn_lang label."""
+    markups: dict[str, _Markup] = {}
+    
+    @wraps(builder)
+    def wrapper(texts: dict) -> _Markup:
+        key = texts["btn_lang"]
+        markup = markups.get(key)
+        if markup is None:
+            markup = markups[key] = builder(texts)
+        return markup
+    
+    return wrapper
 
 
+@cache
 def get_lang_kb() -> InlineKeyboardMarkup:
     """Language selection inline keyboard."""
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -21,6 +48,7 @@ def get_lang_kb() -> InlineKeyboardMarkup:
     ])
 
 
+@_per_language
 def get_main_menu(texts: dict) -> ReplyKeyboardMarkup:
     """Main menu reply keyboard with buttons from localization."""
     return ReplyKeyboardMarkup(
@@ -42,6 +70,7 @@ def get_main_menu(texts: dict) -> ReplyKeyboardMarkup:
     )
 
 
+@_per_language
 def get_valuation_kb(texts: dict) -> InlineKeyboardMarkup:
     """Inline keyboard under valuation result."""
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -60,18 +89,22 @@ def get_valuation_kb(texts: dict) -> InlineKeyboardMarkup:
         [
             InlineKeyboardButton(
                 text=texts["btn_contact"], 
-                url=f"https://t.me/{ADMIN_USERNAME}"
+                url=f"https://t.me/{settings.ADMIN_USERNAME}"
             ),
         ],
         [
             InlineKeyboardButton(
                 text=texts["btn_channel"], 
-                url=CHANNEL_URL
+                url=settings.CHANNEL_URL
             ),
         ],
     ])
 
 
+# (locale marker, manager link, channel url, show group button) -> markup
+_RESULT_KB: dict[tuple[str, str, str, bool], InlineKeyboardMarkup] = {}
+
+
 def get_valuation_result_keyboard(
     manager_link: str,
     channel_url: str,
@@ -87,6 +120,22 @@ def get_valuation_result_keyboard(
         texts: Localization texts
         show_group_button: Whether to show group button
     """
+    # Links and the flag come from settings, so in practice this is one markup per locale
+    key = (texts["btn_lang"], manager_link, channel_url, show_group_button)
+    markup = _RESULT_KB.get(key)
+    if markup is None:
+        markup = _RESULT_KB[key] = _build_valuation_result_keyboard(
+            manager_link, channel_url, texts, show_group_button
+        )
+    return markup
+
+
+def _build_valuation_result_keyboard(
+    manager_link: str,
+    channel_url: str,
+    texts: dict,
+    show_group_button: bool
+) -> InlineKeyboardMarkup:
     buttons = [
         [
             InlineKeyboardButton(
@@ -114,8 +163,20 @@ def get_valuation_result_keyboard(
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+# (locale marker, manager link) -> markup
+_MANAGER_KB: dict[tuple[str, str], InlineKeyboardMarkup] = {}
+
+
 def get_manager_keyboard(manager_link: str, texts: dict) -> InlineKeyboardMarkup:
     """Simple keyboard with manager contact button."""
+    key = (texts["btn_lang"], manager_link)
+    markup = _MANAGER_KB.get(key)
+    if markup is None:
+        markup = _MANAGER_KB[key] = _build_manager_keyboard(manager_link, texts)
+    return markup
+
+
+def _build_manager_keyboard(manager_link: str, texts: dict) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[
         [
             InlineKeyboardButton(
@@ -126,31 +187,33 @@ def get_manager_keyboard(manager_link: str, texts: dict) -> InlineKeyboardMarkup
     ])
 
 
+@_per_language
 def get_sell_kb(texts: dict) -> InlineKeyboardMarkup:
     """Inline keyboard for sell confirmation."""
     return InlineKeyboardMarkup(inline_keyboard=[
         [
             InlineKeyboardButton(
                 text=texts["btn_proceed"], 
-                url=f"https://t.me/{ADMIN_USERNAME}"
+                url=f"https://t.me/{settings.ADMIN_USERNAME}"
             ),
         ],
         [
             InlineKeyboardButton(
                 text=texts["btn_channel"], 
-                url=CHANNEL_URL
+                url=settings.CHANNEL_URL
             ),
         ],
     ])
 
 
+@_per_language
 def get_channel_kb(texts: dict) -> InlineKeyboardMarkup:
     """Inline keyboard for channel link."""
     return InlineKeyboardMarkup(inline_keyboard=[
         [
             InlineKeyboardButton(
                 text=texts["btn_go_channel"], 
-                url=CHANNEL_URL
+                url=settings.CHANNEL_URL
             ),
         ],
     ])
@@ -0,0 +1,19 @@
+"""Localization texts, parsed once at import and shared by every module."""
+from pathlib import Path
+
+import orjson
+
+__all__ = ["ALL_TEXTS", "get_texts"]
+
+LOCALES_DIR = Path(__file__).parent
+
+# Language code -> texts, one entry per locales/<lang>.json
+ALL_TEXTS: dict[str, dict] = {
+    path.stem: orjson.loads(path.read_bytes())
+    for path in sorted(LOCALES_DIR.glob("*.json"))
+}
+
+
+def get_texts(lang: str) -> dict:
+    """Get localization texts for specified language, falling back to English."""
+    return ALL_TEXTS.get(lang, ALL_TEXTS["en"])
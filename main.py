@@ -1,16 +1,20 @@
 import asyncio
 import logging
 
+import orjson
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
-from config import BOT_TOKEN, REMINDER_ENABLED
+from config import settings
 from database.db import db
+from services.config_sync import config_sync
+from services.logic import close_session as close_logic_session
+from services.reminder_service import ReminderService
 from handlers.basic import router as basic_router
 from handlers.valuation import router as valuation_router
 from handlers.admin import router as admin_router
-from middleware.admin_check import AdminCheckMiddleware
 
 
 logging.basicConfig(
@@ -22,26 +26,17 @@ logger = logging.getLogger(__name__)
 
 async def reminder_task(bot: Bot):
     """Background task to check and send reminders."""
-    if not REMINDER_ENABLED:
+    if not settings.REMINDER_ENABLED:
         logger.info("Reminder task is disabled")
         return
     
-    from services.reminder_service import ReminderService
-    from services.config_sync import ConfigSyncService
-    from datetime import datetime
-    
     reminder_service = ReminderService(db)
-    config_sync = ConfigSyncService(db)
-    logger.info("Reminder task started with dynamic interval and .env sync")
-    
-    last_check_time = None
+    logger.info("Reminder task started with dynamic interval")
     
     while True:
         try:
-            # Check and sync .env file changes
-            env_synced = await config_sync.check_and_sync()
-            if env_synced:
-                logger.info("✅ Settings synced from .env file")
+            # Anything that changes after this point wakes the next sleep early
+            config_sync.settings_changed.clear()
             
             # Get interval from database settings (читаем каждую итерацию)
             interval_str = await db.get_system_setting('reminder_check_interval', '1')
@@ -49,64 +44,67 @@ async def reminder_task(bot: Bot):
                 interval_minutes = int(interval_str)
             except ValueError:
                 interval_minutes = 1
-                logger.warning(f"Invalid reminder_check_interval value: {interval_str}, using default: 1")
+                logger.warning("Invalid reminder_check_interval value: %s, using default: 1", interval_str)
             
-            current_time = datetime.now()
+            logger.debug("Checking for pending reminders (interval: %s min)...", interval_minutes)
+            stats = await reminder_service.process_reminders(bot)
             
-            # Проверяем, нужно ли выполнять проверку
-            should_check = False
-            if last_check_time is None:
-                should_check = True  # Первый запуск
-            else:
-                elapsed = (current_time - last_check_time).total_seconds() / 60
-                if elapsed >= interval_minutes:
-                    should_check = True
+            if stats['total'] > 0:
+                logger.info("Processed reminders: %s", stats)
             
-            if should_check:
-                logger.debug(f"Checking for pending reminders (interval: {interval_minutes} min)...")
-                stats = await reminder_service.process_reminders(bot)
-                last_check_time = current_time
-                
-                if stats['total'] > 0:
-                    logger.info(f"Processed reminders: {stats}")
-            
-            # Короткий sleep для быстрой реакции на изменения интервала
-            await asyncio.sleep(10)
+            # Спим до следующей проверки, либо пока админ не изменит интервал
+            try:
+                await asyncio.wait_for(
+                    config_sync.settings_changed.wait(),
+                    timeout=interval_minutes * 60
+                )
+            except TimeoutError:
+                pass
         
         except asyncio.CancelledError:
             logger.info("Reminder task cancelled")
             break
         except Exception as e:
-            logger.error(f"Error in reminder task: {e}")
+            logger.error("Error in reminder task: %s", e)
             await asyncio.sleep(60)  # Wait a bit before retrying
 
 
+def _json_dumps(obj) -> str:
+    # aiogram expects str from json_dumps, orjson produces bytes
+    return orjson.dumps(obj).decode()
+
+
 async def main():
+    # orjson for Bot API request and response bodies, keyboards are the bulk of them
+    session = AiohttpSession(json_loads=orjson.loads, json_dumps=_json_dumps)
     bot = Bot(
-        token=BOT_TOKEN,
+        token=settings.BOT_TOKEN,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN)
     )
     dp = Dispatcher()
     
-    # Add middleware
-    dp.message.middleware(AdminCheckMiddleware())
-    dp.callback_query.middleware(AdminCheckMiddleware())
-    
     # Include routers
-    dp.include_router(admin_router)  # Admin router first for priority
-    dp.include_router(basic_router)
-    dp.include_router(valuation_router)
+    dp.include_routers(
+        admin_router,  # Admin router first for priority
+        basic_router,
+        valuation_router
+    )
     
     # Start background tasks
     reminder_task_handle = None
+    config_watch_handle = None
     
     try:
         logger.info("Подключение к базе данных...")
         await db.connect()
         logger.info("База данных подключена")
         
+        # Sync .env edits to the database as they happen
+        config_watch_handle = asyncio.create_task(config_sync.watch())
+        
         # Start reminder background task
-        if REMINDER_ENABLED:
+        if settings.REMINDER_ENABLED:
             reminder_task_handle = asyncio.create_task(reminder_task(bot))
             logger.info("Reminder task создана")
         
@@ -114,17 +112,25 @@ async def main():
         await dp.start_polling(bot)
     finally:
         # Cancel background tasks
-        if reminder_task_handle:
-            reminder_task_handle.cancel()
-            try:
-                await reminder_task_handle
-            except asyncio.CancelledError:
-                pass
+        for handle in (reminder_task_handle, config_watch_handle):
+            if handle:
+                handle.cancel()
+                try:
+                    await handle
+                except asyncio.CancelledError:
+                    pass
         
         logger.info("Закрытие соединения с БД...")
         await db.close()
+        await close_logic_session()
         await bot.session.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        import uvloop
+    except ImportError:
+        # uvloop is unavailable on Windows, fall back to the default loop
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
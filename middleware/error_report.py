@@ -0,0 +1,49 @@
+"""Middleware to report failed handlers back to the user."""
+import logging
+from typing import Callable, Awaitable, Any
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import Message, CallbackQuery
+
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorReportMiddleware(BaseMiddleware):
+    """Middleware that turns expected handler failures into a short error reply.
+
+    Registered as inner middleware, so it wraps exactly the handlers of its router
+    and they don't each need their own try/except. Exceptions outside ``errors``
+    propagate to aiogram's error logging as before.
+    """
+
+    def __init__(self, errors: tuple[type[Exception], ...], text: str = "❌ Ошибка"):
+        self.errors = errors
+        self.text = text
+
+    async def __call__(
+        self,
+        handler: Callable[[Message | CallbackQuery, dict[str, Any]], Awaitable[Any]],
+        event: Message | CallbackQuery,
+        data: dict[str, Any]
+    ) -> Any:
+        """Run the handler, logging and reporting any of the expected errors."""
+        try:
+            return await handler(event, data)
+        except* self.errors:
+            # Routed callbacks name their screen handler, everything else the registered one
+            callback = data.get("route") or data["handler"].callback
+            logger.exception("Error in %s", callback.__name__)
+            await self._report(event)
+
+    async def _report(self, event: Message | CallbackQuery) -> None:
+        if isinstance(event, Message):
+            await event.answer(self.text)
+            return
+
+        try:
+            await event.answer(self.text, show_alert=True)
+        except TelegramAPIError:
+            # Screens acknowledge the tap up front, so the alert can't be shown any more
+            await event.message.answer(self.text)
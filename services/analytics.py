@@ -1,20 +1,65 @@
 """Analytics service for generating statistics and reports."""
+import asyncio
 import logging
-from datetime import datetime, timedelta, date
-from typing import Optional
+from datetime import datetime, timedelta, date, time
+from typing import Any, Awaitable, Callable, Hashable, Optional
 
+from cachetools import TTLCache
+
+from config import settings
 from database.db import Database
-from database.models import EventType, DailyStats
+from database.models import EventType, DAILY_STATS_COLUMNS
 
 
 logger = logging.getLogger(__name__)
 
+# Cache sentinel distinguishing "not cached" from a cached None
+_MISSING = object()
+
+# Upper bound on cache age for figures covering today; flushed events clear them sooner
+LIVE_STATS_TTL = 30
+
 
 class AnalyticsService:
     """Service for generating statistics and analytics."""
     
     def __init__(self, db: Database):
         self.db = db
+        # "main" / date -> stats dict, so repeated admin taps skip the aggregate queries;
+        # everything here includes today, so it is short-lived and cleared on each event flush
+        self._stats_cache: TTLCache = TTLCache(
+            maxsize=64, ttl=min(settings.STATS_CACHE_TTL, LIVE_STATS_TTL)
+        )
+        # Closed days and periods no longer change, so they can be kept much longer
+        self._history_cache: TTLCache = TTLCache(maxsize=256, ttl=3600)
+        # user_id -> summary dict, or None for unknown users so repeated misses skip the query
+        self._summary_cache: TTLCache = TTLCache(maxsize=10_000, ttl=120)
+        # Stats cache key -> computation in flight, shared by concurrent misses
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        # New events change every figure that includes today
+        db.add_flush_listener(self._stats_cache.clear)
+    
+    def _cache_for(self, last_day: date) -> TTLCache:
+        """Cache to use for stats whose range ends on last_day."""
+        return self._history_cache if last_day < date.today() else self._stats_cache
+    
+    async def _cached(
+        self,
+        cache: TTLCache,
+        key: Hashable,
+        compute: Callable[[], Awaitable[dict[str, Any]]]
+    ) -> dict:
+        """Return cached stats, computing them once for all concurrent callers on a miss."""
+        stats = cache.get(key)
+        if stats is None:
+            task = self._inflight.get(key)
+            if task is None:
+                task = self._inflight[key] = asyncio.create_task(compute())
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            # A caller giving up (e.g. a cancelled handler) must not cancel the shared query
+            stats = await asyncio.shield(task)
+            cache[key] = stats
+        return dict(stats)
     
     # ==================== General Statistics ====================
     
@@ -30,16 +75,25 @@ class AnalyticsService:
     
     async def get_restarts_today(self) -> int:
         """Get number of bot restarts today."""
-        start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        end_date = datetime.now()
-        return await self.db.get_event_count(EventType.BOT_RESTART, start_date, end_date)
+        return await self.get_event_count_today(EventType.BOT_RESTART)
     
     async def get_event_count_today(self, event_type: str) -> int:
         """Get count of specific event type today."""
-        start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        # One clock read, so the range can't straddle midnight
         end_date = datetime.now()
+        start_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
         return await self.db.get_event_count(event_type, start_date, end_date)
     
+    async def get_daily_stats(self, target_date: date) -> dict:
+        """Get the precomputed daily_stats_cache row for a date, computing it on first access."""
+        if target_date >= date.today():
+            # The background refresher rebuilds today's row only once a minute
+            return await self.db.refresh_daily_stats(target_date)
+        row = await self.db.get_daily_stats(target_date)
+        if row is None:
+            row = await self.db.refresh_daily_stats(target_date)
+        return row
+    
     async def get_main_stats(self) -> dict:
         """
         Get main statistics for admin panel.
@@ -49,69 +103,79 @@ class AnalyticsService:
                            group_visits, manager_contacts, nickname_checks,
                            checkout_starts, successful_orders, abandoned_checkouts
         """
-        total_users = await self.get_total_users()
-        new_users_24h = await self.get_new_users(24)
-        restarts_today = await self.get_restarts_today()
-        
-        # Get event counts for today
-        group_visits = await self.get_event_count_today(EventType.GO_TO_GROUP)
-        manager_contacts = await self.get_event_count_today(EventType.CONTACT_MANAGER)
-        nickname_checks = await self.get_event_count_today(EventType.CHECK_NICKNAME)
-        checkout_starts = await self.get_event_count_today(EventType.START_CHECKOUT)
-        successful_orders = await self.get_event_count_today(EventType.SUCCESSFUL_ORDER)
-        abandoned_checkouts = await self.get_event_count_today(EventType.ABANDONED_CHECKOUT)
+        return await self._cached(self._stats_cache, "main", self._compute_main_stats)
+    
+    async def _compute_main_stats(self) -> dict:
+        # Today's event counts come from its daily_stats_cache row, rebuilt on read;
+        # the three reads are independent, so they share one round trip of latency
+        total_users, new_users_24h, today = await asyncio.gather(
+            self.get_total_users(),
+            self.get_new_users(24),
+            self.get_daily_stats(date.today())
+        )
         
-        return {
+        stats = {
             'total_users': total_users,
             'new_users_24h': new_users_24h,
-            'restarts_today': restarts_today,
-            'group_visits': group_visits,
-            'manager_contacts': manager_contacts,
-            'nickname_checks': nickname_checks,
-            'checkout_starts': checkout_starts,
-            'successful_orders': successful_orders,
-            'abandoned_checkouts': abandoned_checkouts,
+            'restarts_today': today['bot_restarts'],
+            'group_visits': today['group_visits'],
+            'manager_contacts': today['manager_contacts'],
+            'nickname_checks': today['nickname_checks'],
+            'checkout_starts': today['checkout_starts'],
+            'successful_orders': today['successful_orders'],
+            'abandoned_checkouts': today['abandoned_checkouts'],
         }
+        return stats
     
     # ==================== Date-specific Statistics ====================
     
     async def get_stats_by_date(self, target_date: date) -> dict:
         """Get statistics for a specific date."""
-        start_datetime = datetime.combine(target_date, datetime.min.time())
-        end_datetime = datetime.combine(target_date, datetime.max.time())
-        
-        new_users = await self.db.get_new_users(start_datetime, end_datetime)
+        return await self._cached(
+            self._cache_for(target_date),
+            target_date,
+            lambda: self._compute_stats_by_date(target_date)
+        )
+    
+    async def _compute_stats_by_date(self, target_date: date) -> dict:
+        row = await self.get_daily_stats(target_date)
         
         stats = {
             'date': target_date,
-            'new_users': new_users,
+            'new_users': row['new_users'],
         }
         
-        # Get counts for each event type
-        for event_type in EventType.all_types():
-            count = await self.db.get_event_count(event_type, start_datetime, end_datetime)
-            stats[event_type] = count
+        # Counts for each event type
+        for event_type, column in DAILY_STATS_COLUMNS.items():
+            stats[event_type] = row[column]
         
         return stats
     
     async def get_stats_for_period(self, start_date: date, end_date: date) -> dict:
         """Get aggregated statistics for a date range."""
-        start_datetime = datetime.combine(start_date, datetime.min.time())
-        end_datetime = datetime.combine(end_date, datetime.max.time())
+        return await self._cached(
+            self._cache_for(end_date),
+            ("period", start_date, end_date),
+            lambda: self._compute_stats_for_period(start_date, end_date)
+        )
+    
+    async def _compute_stats_for_period(self, start_date: date, end_date: date) -> dict:
+        # Half-open [start, day after end), so the range ends on a partition/index boundary
+        start_datetime = datetime.combine(start_date, time.min)
+        end_datetime = datetime.combine(end_date + timedelta(days=1), time.min)
         
-        new_users = await self.db.get_new_users(start_datetime, end_datetime)
+        # Counts for every event type come from one grouped query
+        new_users, event_counts = await asyncio.gather(
+            self.db.get_new_users(start_datetime, end_datetime),
+            self.db.get_event_counts(EventType.all_types(), start_datetime, end_datetime)
+        )
         
         stats = {
             'start_date': start_date,
             'end_date': end_date,
             'new_users': new_users,
+            **event_counts,
         }
-        
-        # Get counts for each event type
-        for event_type in EventType.all_types():
-            count = await self.db.get_event_count(event_type, start_datetime, end_datetime)
-            stats[event_type] = count
-        
         return stats
     
     # ==================== User-specific Statistics ====================
@@ -123,7 +187,11 @@ class AnalyticsService:
     
     async def get_user_summary(self, user_id: int) -> Optional[dict]:
         """Get summary statistics for a specific user."""
-        return await self.db.get_user_stats(user_id)
+        summary = self._summary_cache.get(user_id, _MISSING)
+        if summary is _MISSING:
+            summary = await self.db.get_user_stats(user_id)
+            self._summary_cache[user_id] = summary
+        return dict(summary) if summary is not None else None
     
     async def get_users_list(self, page: int = 1, page_size: int = 10) -> dict:
         """
@@ -133,8 +201,7 @@ class AnalyticsService:
             dict with keys: users (list), total_count, page, page_size, total_pages
         """
         offset = (page - 1) * page_size
-        users = await self.db.get_users_list(limit=page_size, offset=offset)
-        total_count = await self.db.get_total_users()
+        users, total_count = await self.db.get_users_page(limit=page_size, offset=offset)
         total_pages = (total_count + page_size - 1) // page_size  # Ceiling division
         
         return {
@@ -3,46 +3,47 @@ import asyncio
 import logging
 from typing import Optional
 from aiogram import Bot
-from aiogram.types import FSInputFile
-from aiogram.exceptions import TelegramForbiddenError, TelegramBadRequest
+from aiogram.exceptions import TelegramForbiddenError, TelegramBadRequest, TelegramRetryAfter
 
 from database.db import Database
+from utils.rate_limit import SendLimiter, send_limiter
 
 
 logger = logging.getLogger(__name__)
 
+# Flood-control retries per recipient before the send is counted as failed
+MAX_RETRY_AFTER_ATTEMPTS = 3
+
 
 class BroadcastService:
     """Service for managing broadcasts."""
     
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, limiter: SendLimiter = send_limiter):
         self.db = db
-    
-    async def get_active_users(self) -> list[dict]:
-        """Get list of active users for broadcast."""
-        if not self.db.pool:
-            logger.error("Database pool is not initialized")
-            return []
-        return await self.db.get_active_users_for_broadcast()
+        # Telegram's flood limit is per bot, so broadcasts share one budget with reminders
+        self.limiter = limiter
     
     async def send_broadcast_message(
         self,
         bot: Bot,
         user_id: int,
         text: str,
-        photo: Optional[str] = None
+        photo_file_id: Optional[str] = None
     ) -> tuple[bool, Optional[str]]:
         """
         Send broadcast message to a single user.
         
         Returns:
             tuple: (success: bool, error_message: Optional[str])
+        
+        Raises:
+            TelegramRetryAfter: Flood control hit, the caller decides when to retry
         """
         try:
-            if photo:
+            if photo_file_id:
                 await bot.send_photo(
                     chat_id=user_id,
-                    photo=FSInputFile(photo),
+                    photo=photo_file_id,
                     caption=text
                 )
             else:
@@ -53,25 +54,31 @@ class BroadcastService:
             return (True, None)
         
         except TelegramForbiddenError:
-            # User blocked the bot
-            await self.db.mark_user_blocked(user_id)
-            logger.info(f"User {user_id} has blocked the bot")
+            # User blocked the bot; a failed write mustn't abort the rest of the broadcast
+            try:
+                await self.db.mark_user_blocked(user_id)
+            except Exception as e:
+                logger.error("Failed to mark user %s as blocked: %s", user_id, e)
+            logger.info("User %s has blocked the bot", user_id)
             return (False, "blocked")
         
         except TelegramBadRequest as e:
-            logger.warning(f"Bad request for user {user_id}: {e}")
+            logger.warning("Bad request for user %s: %s", user_id, e)
             return (False, f"bad_request: {e}")
         
+        except TelegramRetryAfter:
+            raise
+        
         except Exception as e:
-            logger.error(f"Error sending broadcast to user {user_id}: {e}")
+            logger.error("Error sending broadcast to user %s: %s", user_id, e)
             return (False, f"error: {e}")
     
     async def execute_broadcast(
         self,
         bot: Bot,
         text: str,
-        photo: Optional[str] = None,
-        delay: float = 0.05
+        photo_file_id: Optional[str] = None,
+        workers: int = 20
     ) -> dict:
         """
         Execute broadcast to all active users.
@@ -79,16 +86,14 @@ class BroadcastService:
         Args:
             bot: Bot instance
             text: Message text
-            photo: Optional path to photo file
-            delay: Delay between messages in seconds (default 0.05s = 20 msg/s)
+            photo_file_id: Optional Telegram file_id of an already uploaded photo
+            workers: Number of messages in flight at once
         
         Returns:
             dict: Statistics of the broadcast
         """
-        try:
-            users = await self.get_active_users()
-        except Exception as e:
-            logger.error(f"Failed to get active users: {e}")
+        if not self.db.pool:
+            logger.error("Database pool is not initialized")
             return {
                 'total': 0,
                 'success': 0,
@@ -96,37 +101,66 @@ class BroadcastService:
                 'failed': 0
             }
         
-        total = len(users)
+        total = 0
         success = 0
         blocked = 0
         failed = 0
         
-        logger.info(f"Starting broadcast to {total} users")
+        # None tells a worker to stop; the bound keeps the cursor just ahead of the senders
+        queue: asyncio.Queue[Optional[int]] = asyncio.Queue(maxsize=workers * 2)
         
-        if total == 0:
-            logger.warning("No active users found for broadcast")
-            return {
-                'total': 0,
-                'success': 0,
-                'blocked': 0,
-                'failed': 0
-            }
+        async def worker() -> None:
+            nonlocal success, blocked, failed
+            while (user_id := await queue.get()) is not None:
+                is_success, error = False, "retry_after"
+                for _ in range(MAX_RETRY_AFTER_ATTEMPTS):
+                    # Waits only once sends are ahead of the rate, so RTTs overlap freely
+                    await self.limiter.wait()
+                    try:
+                        is_success, error = await self.send_broadcast_message(
+                            bot, user_id, text, photo_file_id
+                        )
+                    except TelegramRetryAfter as e:
+                        # Flood control applies to the whole bot, so every worker backs off
+                        logger.warning("Flood control during broadcast, waiting %ss", e.retry_after)
+                        self.limiter.pause(e.retry_after)
+                        continue
+                    except Exception as e:
+                        # Keep the worker alive, a dead one would leave the producer blocked
+                        logger.error("Unexpected error broadcasting to user %s: %s", user_id, e)
+                        is_success, error = False, f"error: {e}"
+                    break
+                else:
+                    logger.warning("Giving up on user %s after repeated flood control", user_id)
+                
+                if is_success:
+                    success += 1
+                elif error == "blocked":
+                    blocked += 1
+                else:
+                    failed += 1
         
-        for user in users:
-            user_id = user['user_id']
-            is_success, error = await self.send_broadcast_message(
-                bot, user_id, text, photo
-            )
+        logger.info("Starting broadcast")
+        
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(workers):
+                tg.create_task(worker())
             
-            if is_success:
-                success += 1
-            elif error == "blocked":
-                blocked += 1
-            else:
-                failed += 1
+            try:
+                # Users stream from a cursor, so the next batch is fetched while this one is sent
+                async for user in self.db.iter_active_users_for_broadcast():
+                    total += 1
+                    await queue.put(user['user_id'])
+            except Exception as e:
+                logger.error("Failed to read active users: %s", e)
             
-            # Add delay to avoid hitting rate limits
-            await asyncio.sleep(delay)
+            # Not in a finally: if the group is cancelled, the workers are too and
+            # nobody would drain the bounded queue, so the puts would block forever
+            for _ in range(workers):
+                await queue.put(None)
+        
+        if total == 0:
+            logger.warning("No active users found for broadcast")
         
         stats = {
             'total': total,
@@ -135,5 +169,5 @@ class BroadcastService:
             'failed': failed
         }
         
-        logger.info(f"Broadcast completed: {stats}")
+        logger.info("Broadcast completed: %s", stats)
         return stats
@@ -1,9 +1,16 @@
 """Service for syncing .env file changes to database."""
+import asyncio
 import logging
 import os
 from pathlib import Path
 from dotenv import load_dotenv, set_key
-from database.db import Database
+from database.db import Database, db
+
+try:
+    from asyncinotify import Inotify, Mask
+except ImportError:
+    # inotify is Linux-only, elsewhere the watcher falls back to checking mtime on a timer
+    Inotify = None
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +23,9 @@ class ConfigSyncService:
         self.env_file = Path(__file__).parent.parent / '.env'
         self.last_modified = None
         
+        # Set when reminder settings change, so the reminder loop wakes up early
+        self.settings_changed = asyncio.Event()
+        
         # Mapping of env variables to database settings
         self.sync_map = {
             'REMINDER_DELAY_MINUTES': 'reminder_delay_minutes',
@@ -34,12 +44,12 @@ class ConfigSyncService:
             bool: True if changes were synced
         """
         try:
-            if not self.env_file.exists():
+            # Check if file was modified; file I/O stays off the event loop
+            try:
+                current_modified = (await asyncio.to_thread(self.env_file.stat)).st_mtime
+            except FileNotFoundError:
                 return False
             
-            # Check if file was modified
-            current_modified = self.env_file.stat().st_mtime
-            
             if self.last_modified is None:
                 self.last_modified = current_modified
                 return False
@@ -51,8 +61,8 @@ class ConfigSyncService:
             logger.info("Detected .env file changes, syncing to database...")
             self.last_modified = current_modified
             
-            # Reload .env file
-            load_dotenv(override=True)
+            # Reload .env file (by path: dotenv's own lookup walks the caller's frame)
+            await asyncio.to_thread(load_dotenv, self.env_file, override=True)
             
             changes = []
             for env_key, db_key in self.sync_map.items():
@@ -72,6 +82,7 @@ class ConfigSyncService:
             
             if changes:
                 logger.info(f"Synced {len(changes)} settings from .env to database")
+                self.settings_changed.set()
                 return True
             
             return False
@@ -80,6 +91,24 @@ class ConfigSyncService:
             logger.error(f"Error syncing .env to database: {e}")
             return False
     
+    async def watch(self, poll_interval: float = 60) -> None:
+        """Sync .env changes to the database as soon as the file is written, until cancelled."""
+        # Record the current mtime, so only edits made from now on are synced
+        await self.check_and_sync()
+        
+        if Inotify is None:
+            while True:
+                await asyncio.sleep(poll_interval)
+                await self.check_and_sync()
+        
+        env_name = Path(self.env_file.name)
+        with Inotify() as inotify:
+            # Watch the directory: set_key and most editors replace .env by renaming over it
+            inotify.add_watch(self.env_file.parent, Mask.CLOSE_WRITE | Mask.MOVED_TO | Mask.CREATE)
+            async for event in inotify:
+                if event.name == env_name:
+                    await self.check_and_sync()
+    
     async def sync_to_env(self, db_key: str, value: str) -> bool:
         """
         Sync a database setting back to .env file.
@@ -98,19 +127,24 @@ class ConfigSyncService:
                 logger.warning(f"No .env mapping found for {db_key}")
                 return False
             
-            if not self.env_file.exists():
+            if not await asyncio.to_thread(self.env_file.exists):
                 logger.error(f".env file not found at {self.env_file}")
                 return False
             
-            # Write to .env file
-            set_key(str(self.env_file), env_key, str(value))
+            # Write to .env file off the event loop, so callers can overlap it with DB writes
+            await asyncio.to_thread(set_key, str(self.env_file), env_key, str(value))
             logger.info(f"Updated .env file: {env_key}={value}")
             
             # Update last modified time to prevent re-sync loop
-            self.last_modified = self.env_file.stat().st_mtime
+            self.last_modified = (await asyncio.to_thread(self.env_file.stat)).st_mtime
             
             return True
             
         except Exception as e:
             logger.error(f"Error writing to .env file: {e}")
             return False
+
+
+# Shared by the reminder loop and admin handlers, so a write-back from the admin
+# panel updates the same last_modified the .env watcher compares against
+config_sync = ConfigSyncService(db)
@@ -32,22 +32,18 @@ class EventLogger:
             username: Username to save (optional)
         """
         try:
-            await self.db.add_event(user_id, event_type, metadata or {})
-            # Update username if provided
-            if username:
-                await self.db.update_user_info(user_id, username)
-            logger.info(f"Event logged: {event_type} for user {user_id}")
+            # Queued for the batched flusher, which also saves the username if provided;
+            # add_event stores a missing metadata dict as {}
+            await self.db.add_event(user_id, event_type, metadata, username)
+            logger.info("Event logged: %s for user %s", event_type, user_id)
         except Exception as e:
-            logger.error(f"Failed to log event {event_type} for user {user_id}: {e}")
+            logger.error("Failed to log event %s for user %s: %s", event_type, user_id, e)
     
     # Convenience methods for specific events
     
     async def log_first_start(self, user_id: int, username: Optional[str] = None) -> None:
         """Log user's first start of the bot."""
-        metadata = {}
-        if username:
-            metadata['username'] = username
-        await self.log_event(user_id, EventType.FIRST_START, metadata)
+        await self.log_event(user_id, EventType.FIRST_START, {'username': username} if username else None)
     
     async def log_bot_restart(self, user_id: int) -> None:
         """Log user restarting the bot."""
@@ -55,17 +51,11 @@ class EventLogger:
     
     async def log_go_to_group(self, user_id: int, group_url: Optional[str] = None) -> None:
         """Log user clicking 'Go to group' button."""
-        metadata = {}
-        if group_url:
-            metadata['group_url'] = group_url
-        await self.log_event(user_id, EventType.GO_TO_GROUP, metadata)
+        await self.log_event(user_id, EventType.GO_TO_GROUP, {'group_url': group_url} if group_url else None)
     
     async def log_contact_manager(self, user_id: int, manager_username: Optional[str] = None) -> None:
         """Log user clicking 'Contact manager' button."""
-        metadata = {}
-        if manager_username:
-            metadata['manager_username'] = manager_username
-        await self.log_event(user_id, EventType.CONTACT_MANAGER, metadata)
+        await self.log_event(user_id, EventType.CONTACT_MANAGER, {'manager_username': manager_username} if manager_username else None)
     
     async def log_check_nickname(self, user_id: int, nickname: str, price_range: Optional[tuple] = None) -> None:
         """Log user checking nickname valuation."""
@@ -81,17 +71,11 @@ class EventLogger:
     
     async def log_start_checkout(self, user_id: int, nickname: Optional[str] = None) -> None:
         """Log user starting checkout process."""
-        metadata = {}
-        if nickname:
-            metadata['nickname'] = nickname
-        await self.log_event(user_id, EventType.START_CHECKOUT, metadata)
+        await self.log_event(user_id, EventType.START_CHECKOUT, {'nickname': nickname} if nickname else None)
     
     async def log_abandoned_checkout(self, user_id: int, nickname: Optional[str] = None) -> None:
         """Log user abandoning checkout process."""
-        metadata = {}
-        if nickname:
-            metadata['nickname'] = nickname
-        await self.log_event(user_id, EventType.ABANDONED_CHECKOUT, metadata)
+        await self.log_event(user_id, EventType.ABANDONED_CHECKOUT, {'nickname': nickname} if nickname else None)
     
     async def log_successful_order(
         self,
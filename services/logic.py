@@ -1,55 +1,115 @@
+import asyncio
 import random
+from typing import Optional
+
 import aiohttp
+from cachetools import TTLCache
+
+
+# Private generator for valuations, so they don't share (or reseed) the global random state
+_rng = random.Random()
+
+# Normalized username -> whether its t.me page exists; re-checks of a handle skip the request
+_exists_cache: TTLCache = TTLCache(maxsize=10_000, ttl=3600)
+# Normalized username -> check in flight
+_inflight: dict[str, asyncio.Task] = {}
+
+# Profile markers on t.me pages; the tail of each chunk is kept in case one spans chunks
+_PROFILE_MARKERS = (b"tgme_page_photo", b"tgme_page_title")
+_MARKER_TAIL = max(map(len, _PROFILE_MARKERS)) - 1
+
+# One keep-alive session for all checks, created on first use inside the running loop
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=50, ttl_dns_cache=300, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=5)
+        )
+    return _session
+
+
+async def close_session() -> None:
+    """Close the shared t.me session; called on bot shutdown."""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
 
 
 async def check_username_exists(username: str) -> bool:
     """Check if Telegram username exists via t.me page."""
-    clean_username = username.lstrip("@")
+    clean_username = username.removeprefix("@").lower()
+    cached = _exists_cache.get(clean_username)
+    if cached is not None:
+        return cached
+    
+    # Concurrent checks of the same handle share one request
+    task = _inflight.get(clean_username)
+    if task is None:
+        task = _inflight[clean_username] = asyncio.create_task(_fetch_exists(clean_username))
+        task.add_done_callback(lambda _: _inflight.pop(clean_username, None))
+    return await asyncio.shield(task)
+
+
+async def _fetch_exists(clean_username: str) -> bool:
     url = f"https://t.me/{clean_username}"
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return False
-                
-                html = await response.text()
-                # Если юзернейм не существует, в HTML будет сообщение о том, что можно связаться
-                # Если существует — будет информация о профиле
-                return "tgme_page_photo" in html or "tgme_page_title" in html
+        async with _get_session().get(url) as response:
+            if response.status != 200:
+                # Ответ без страницы (429, 5xx) ничего не говорит о юзернейме — не кэшируем
+                return True
+            
+            exists = False
+            # Если юзернейм не существует, в HTML будет сообщение о том, что можно связаться
+            # Если существует — будет информация о профиле; читаем только до первого маркера
+            seen = b""
+            async for chunk in response.content.iter_chunked(8192):
+                seen = seen[-_MARKER_TAIL:] + chunk
+                if any(marker in seen for marker in _PROFILE_MARKERS):
+                    exists = True
+                    break
     except Exception:
-        # В случае ошибки сети — пропускаем проверку
+        # В случае ошибки сети — пропускаем проверку (и не кэшируем результат)
         return True
+    
+    _exists_cache[clean_username] = exists
+    return exists
+
+
+# Valuation attribute pools, built once instead of on every valuation
+_CATEGORIES: tuple[str, ...] = (
+    "Premium Real Word", "Crypto Native", "Corporate Brand", 
+    "Luxury Personal", "Web3 Identity", "Short & Concise", 
+    "Tech Startup", "Global Asset", "Visual Symmetric", "Investment Grade"
+)
+_RARITIES: tuple[str, ...] = (
+    "High", "Very High", "Ultra Rare", "Exclusive", 
+    "Collector's Item", "Legendary", "Blue Chip", "Top Tier"
+)
+_DEMANDS: tuple[str, ...] = (
+    "Strong", "Very High", "Aggressive", "Trending Up", 
+    "Peak Interest", "Institutional", "Hot Market"
+)
+_BRANDINGS: tuple[str, ...] = (
+    "Excellent", "Global", "Elite", "Unicorn Status", 
+    "International", "Corporate Grade", "Iconic"
+)
 
 
 def get_valuation_data(username: str) -> dict:
     """Generate valuation data for a Telegram username."""
-    
-    categories = [
-        "Premium Real Word", "Crypto Native", "Corporate Brand", 
-        "Luxury Personal", "Web3 Identity", "Short & Concise", 
-        "Tech Startup", "Global Asset", "Visual Symmetric", "Investment Grade"
-    ]
-    rarities = [
-        "High", "Very High", "Ultra Rare", "Exclusive", 
-        "Collector's Item", "Legendary", "Blue Chip", "Top Tier"
-    ]
-    demands = [
-        "Strong", "Very High", "Aggressive", "Trending Up", 
-        "Peak Interest", "Institutional", "Hot Market"
-    ]
-    brandings = [
-        "Excellent", "Global", "Elite", "Unicorn Status", 
-        "International", "Corporate Grade", "Iconic"
-    ]
-    
     # Remove @ if present
-    clean_username = username.lstrip("@")
+    clean_username = username.removeprefix("@")
     
     # Calculate values
-    aesthetic_score = round(random.uniform(8.2, 9.9), 1)
-    price_low = round(random.randint(1100, 3500), -1)
-    price_high = price_low + random.randint(500, 1500)
+    aesthetic_score = round(_rng.uniform(8.2, 9.9), 1)
+    price_low = round(_rng.randint(1100, 3500), -1)
+    price_high = price_low + _rng.randint(500, 1500)
     
     if price_high > 4500:
         price_high = 4200
@@ -57,11 +117,11 @@ def get_valuation_data(username: str) -> dict:
     return {
         "username": f"@{clean_username}",
         "structure": f"{len(clean_username)} characters",
-        "category": random.choice(categories),
-        "rarity": random.choice(rarities),
-        "demand": random.choice(demands),
+        "category": _rng.choice(_CATEGORIES),
+        "rarity": _rng.choice(_RARITIES),
+        "demand": _rng.choice(_DEMANDS),
         "score": str(aesthetic_score),
-        "branding": random.choice(brandings),
+        "branding": _rng.choice(_BRANDINGS),
         "price_low": price_low,
         "price_high": price_high,
     }
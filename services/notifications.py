@@ -1,11 +1,13 @@
 """Notification service for sending alerts to admins."""
+import asyncio
 import logging
-from typing import Optional
+from typing import Iterable, Optional
 
 from aiogram import Bot
 
 from database.db import Database
-from config import ADMIN_IDS
+from config import settings
+from utils.formatters import escape_html
 
 
 logger = logging.getLogger(__name__)
@@ -32,6 +34,17 @@ class NotificationService:
             logger.error(f"Failed to send notification to admin {admin_id}: {e}")
             return False
     
+    async def _send_to_many(self, admin_ids: Iterable[int], text: str) -> int:
+        """
+        Send message to several admins at once.
+        
+        Returns:
+            Number of admins who received the message
+        """
+        # _send_to_admin never raises, so one slow or failing admin doesn't hold up the rest
+        results = await asyncio.gather(*(self._send_to_admin(admin_id, text) for admin_id in admin_ids))
+        return sum(results)
+    
     async def _send_to_admins(self, text: str, check_settings: bool = True) -> int:
         """
         Send message to all admins.
@@ -39,25 +52,25 @@ class NotificationService:
         Returns:
             Number of admins who received the message
         """
-        sent_count = 0
-        for admin_id in ADMIN_IDS:
-            if await self._send_to_admin(admin_id, text):
-                sent_count += 1
-        return sent_count
+        return await self._send_to_many(settings.ADMIN_IDS, text)
+    
+    async def _subscribed_admins(self, setting: str) -> list[int]:
+        """Admins with the given notification setting enabled."""
+        admin_ids = []
+        for admin_id in settings.ADMIN_IDS:
+            prefs = await self.db.get_notification_settings(admin_id)
+            if prefs.get(setting, True):
+                admin_ids.append(admin_id)
+        return admin_ids
     
     # ==================== Specific Notifications ====================
     
     async def notify_new_user(self, user_id: int, username: Optional[str] = None) -> None:
         """Notify admins about a new user."""
-        for admin_id in ADMIN_IDS:
-            settings = await self.db.get_notification_settings(admin_id)
-            if not settings.get('notify_new_users', True):
-                continue
-            
-            user_display = f"@{username}" if username else f"ID: {user_id}"
-            text = f"🆕 <b>Новый пользователь</b>\n\n{user_display}"
-            
-            await self._send_to_admin(admin_id, text)
+        user_display = f"@{escape_html(username)}" if username else f"ID: {user_id}"
+        text = f"🆕 <b>Новый пользователь</b>\n\n{user_display}"
+        
+        await self._send_to_many(await self._subscribed_admins('notify_new_users'), text)
     
     async def notify_successful_order(
         self,
@@ -67,30 +80,24 @@ class NotificationService:
         price: Optional[int] = None
     ) -> None:
         """Notify admins about a successful order."""
-        for admin_id in ADMIN_IDS:
-            settings = await self.db.get_notification_settings(admin_id)
-            if not settings.get('notify_orders', True):
-                continue
-            
-            user_display = f"@{username}" if username else f"ID: {user_id}"
-            text = f"💰 <b>Заказ оформлен!</b>\n\n"
-            text += f"👤 Пользователь: {user_display}\n"
-            
-            if nickname:
-                text += f"📝 Ник: {nickname}\n"
-            if price:
-                text += f"💵 Цена: ${price:,}\n"
-            
-            await self._send_to_admin(admin_id, text)
+        user_display = f"@{escape_html(username)}" if username else f"ID: {user_id}"
+        text = f"💰 <b>Заказ оформлен!</b>\n\n"
+        text += f"👤 Пользователь: {user_display}\n"
+        
+        if nickname:
+            text += f"📝 Ник: {escape_html(nickname)}\n"
+        if price:
+            text += f"💵 Цена: ${price:,}\n"
+        
+        await self._send_to_many(await self._subscribed_admins('notify_orders'), text)
     
     async def notify_abandoned_checkouts_alert(self, count: int, period_hours: int = 1) -> None:
         """Notify admins about high number of abandoned checkouts."""
-        for admin_id in ADMIN_IDS:
-            settings = await self.db.get_notification_settings(admin_id)
-            if not settings.get('notify_abandoned_checkouts', True):
-                continue
-            
-            threshold = settings.get('abandoned_threshold', 10)
+        # Thresholds are per admin, and so is the text quoting them
+        sends = []
+        for admin_id in await self._subscribed_admins('notify_abandoned_checkouts'):
+            prefs = await self.db.get_notification_settings(admin_id)
+            threshold = prefs.get('abandoned_threshold', 10)
             if count <= threshold:
                 continue
             
@@ -98,21 +105,25 @@ class NotificationService:
             text += f"<b>{count}</b> брошенных оформлений за последний час\n"
             text += f"Это выше порога ({threshold})"
             
-            await self._send_to_admin(admin_id, text)
+            sends.append(self._send_to_admin(admin_id, text))
+        
+        await asyncio.gather(*sends)
     
     async def send_daily_report(self, stats: dict) -> None:
         """Send daily statistics report to all admins."""
-        text = "📊 <b>Дневной отчёт</b>\n\n"
-        text += f"👥 Всего пользователей: {stats.get('total_users', 0)}\n"
-        text += f"🆕 Новых за 24 часа: {stats.get('new_users_24h', 0)}\n"
-        text += f"🔁 Запусков сегодня: {stats.get('restarts_today', 0)}\n\n"
-        text += f"👣 <b>Переходы:</b>\n"
-        text += f"• В группу: {stats.get('group_visits', 0)}\n"
-        text += f"• К менеджеру: {stats.get('manager_contacts', 0)}\n\n"
-        text += f"💰 <b>Действия:</b>\n"
-        text += f"• Проверок ника: {stats.get('nickname_checks', 0)}\n"
-        text += f"• Начали оформление: {stats.get('checkout_starts', 0)}\n"
-        text += f"• Успешные заказы: {stats.get('successful_orders', 0)}\n"
-        text += f"• Брошенные оформления: {stats.get('abandoned_checkouts', 0)}\n"
+        text = (
+            "📊 <b>Дневной отчёт</b>\n\n"
+            f"👥 Всего пользователей: {stats.get('total_users', 0)}\n"
+            f"🆕 Новых за 24 часа: {stats.get('new_users_24h', 0)}\n"
+            f"🔁 Запусков сегодня: {stats.get('restarts_today', 0)}\n\n"
+            "👣 <b>Переходы:</b>\n"
+            f"• В группу: {stats.get('group_visits', 0)}\n"
+            f"• К менеджеру: {stats.get('manager_contacts', 0)}\n\n"
+            "💰 <b>Действия:</b>\n"
+            f"• Проверок ника: {stats.get('nickname_checks', 0)}\n"
+            f"• Начали оформление: {stats.get('checkout_starts', 0)}\n"
+            f"• Успешные заказы: {stats.get('successful_orders', 0)}\n"
+            f"• Брошенные оформления: {stats.get('abandoned_checkouts', 0)}\n"
+        )
         
         await self._send_to_admins(text, check_settings=False)
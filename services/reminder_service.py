@@ -1,21 +1,30 @@
 """Service for reminder functionality."""
+import asyncio
 import logging
 from typing import Optional
 from aiogram import Bot
-from aiogram.exceptions import TelegramForbiddenError, TelegramBadRequest
+from aiogram.exceptions import TelegramForbiddenError, TelegramBadRequest, TelegramRetryAfter
 
 from database.db import Database
-from config import MANAGER_LINK
+from config import settings
+from keyboards.builders import get_manager_keyboard
+from locales import get_texts
+from utils.rate_limit import SendLimiter, send_limiter
 
 
 logger = logging.getLogger(__name__)
 
+# Reminder sends in flight at once; the shared limiter keeps them under Telegram's rate
+REMINDER_CONCURRENCY = 20
+
 
 class ReminderService:
     """Service for managing user reminders."""
     
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, limiter: SendLimiter = send_limiter):
         self.db = db
+        # Shared with broadcasts, so concurrent senders stay under Telegram's per-bot rate
+        self.limiter = limiter
     
     async def check_pending_reminders(self) -> list[dict]:
         """Check for users who need reminders."""
@@ -25,7 +34,7 @@ class ReminderService:
             delay_minutes = int(delay_str)
         except ValueError:
             delay_minutes = 15
-            logger.warning(f"Invalid reminder_delay_minutes value: {delay_str}, using default: 15")
+            logger.warning("Invalid reminder_delay_minutes value: %s, using default: 15", delay_str)
         
         return await self.db.get_users_for_reminder(delay_minutes)
     
@@ -34,7 +43,8 @@ class ReminderService:
         bot: Bot,
         user_id: int,
         texts: dict,
-        manager_link: str = MANAGER_LINK
+        manager_link: str = settings.MANAGER_LINK,
+        mark_sent: bool = True
     ) -> bool:
         """
         Send reminder to a specific user.
@@ -44,16 +54,16 @@ class ReminderService:
             user_id: User ID to send reminder to
             texts: Localization texts
             manager_link: Link to manager
+            mark_sent: Mark the reminder as sent right away (batch callers mark it themselves)
         
         Returns:
             bool: True if sent successfully
         """
         try:
-            from keyboards.builders import get_manager_keyboard
-            
             reminder_text = texts.get('reminder_message', '')
             keyboard = get_manager_keyboard(manager_link, texts)
             
+            await self.limiter.wait()
             await bot.send_message(
                 chat_id=user_id,
                 text=reminder_text,
@@ -61,22 +71,29 @@ class ReminderService:
             )
             
             # Mark reminder as sent
-            await self.db.mark_reminder_sent(user_id)
-            logger.info(f"Reminder sent to user {user_id}")
+            if mark_sent:
+                await self.db.mark_reminder_sent(user_id)
+            logger.info("Reminder sent to user %s", user_id)
             return True
         
         except TelegramForbiddenError:
             # User blocked the bot
             await self.db.mark_user_blocked(user_id)
-            logger.info(f"Cannot send reminder - user {user_id} blocked the bot")
+            logger.info("Cannot send reminder - user %s blocked the bot", user_id)
             return False
         
         except TelegramBadRequest as e:
-            logger.warning(f"Bad request when sending reminder to {user_id}: {e}")
+            logger.warning("Bad request when sending reminder to %s: %s", user_id, e)
+            return False
+        
+        except TelegramRetryAfter as e:
+            # Back off every sender; the reminder stays pending for the next pass
+            self.limiter.pause(e.retry_after)
+            logger.warning("Flood control when sending reminder to %s, waiting %ss", user_id, e.retry_after)
             return False
         
         except Exception as e:
-            logger.error(f"Error sending reminder to {user_id}: {e}")
+            logger.error("Error sending reminder to %s: %s", user_id, e)
             return False
     
     async def process_reminders(self, bot: Bot) -> dict:
@@ -92,30 +109,26 @@ class ReminderService:
             logger.debug("No pending reminders")
             return {'total': 0, 'sent': 0, 'failed': 0}
         
-        sent = 0
-        failed = 0
+        logger.info("Processing %s pending reminders", len(pending_users))
         
-        logger.info(f"Processing {len(pending_users)} pending reminders")
+        # Reminders go out concurrently, at most REMINDER_CONCURRENCY at a time
+        semaphore = asyncio.Semaphore(REMINDER_CONCURRENCY)
         
-        for user_data in pending_users:
-            user_id = user_data['user_id']
-            
-            # Get user's language
-            lang = await self.db.get_language(user_id) or 'en'
-            
-            # Load texts for user's language
-            import json
-            from pathlib import Path
-            locales_dir = Path(__file__).parent.parent / "locales"
-            with open(locales_dir / f"{lang}.json", "r", encoding="utf-8") as f:
-                texts = json.load(f)
-            
-            success = await self.send_reminder(bot, user_id, texts)
-            
-            if success:
-                sent += 1
-            else:
-                failed += 1
+        async def remind(user_data: dict) -> bool:
+            async with semaphore:
+                # User's language comes with the pending row
+                texts = get_texts(user_data['language'] or 'en')
+                return await self.send_reminder(bot, user_data['user_id'], texts, mark_sent=False)
+        
+        results = await asyncio.gather(*(remind(user_data) for user_data in pending_users))
+        
+        # One UPDATE marks every delivered reminder, by the valuation it was sent for
+        sent_ids = [user_data['valuation_id'] for user_data, ok in zip(pending_users, results) if ok]
+        if sent_ids:
+            await self.db.mark_reminders_sent(sent_ids)
+        
+        sent = len(sent_ids)
+        failed = len(results) - sent
         
         stats = {
             'total': len(pending_users),
@@ -123,5 +136,5 @@ class ReminderService:
             'failed': failed
         }
         
-        logger.info(f"Reminder processing completed: {stats}")
+        logger.info("Reminder processing completed: %s", stats)
         return stats
@@ -5,6 +5,24 @@ from typing import Optional
 from database.models import EventType
 
 
+# Event type -> emoji, resolved once instead of per formatted row
+_EMOJI = {event_type: EventType.get_emoji(event_type) for event_type in EventType.all_types()}
+_DEFAULT_EMOJI = EventType.get_emoji("")
+
+_DATE_FORMAT = "%d.%m.%Y"
+_DATETIME_FORMAT = "%d.%m.%Y %H:%M"
+_SHORT_DATETIME_FORMAT = "%d.%m %H:%M"
+_TIME_FORMAT = "%H:%M"
+
+# Characters HTML parse mode treats as markup, escaped in one pass with str.translate
+_HTML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+
+def escape_html(text: str) -> str:
+    """Escape user-supplied text (usernames, nicknames) for HTML parse mode."""
+    return text.translate(_HTML_ESCAPE)
+
+
 def format_main_stats(stats: dict) -> str:
     """
     Format main statistics for display.
@@ -15,22 +33,20 @@ def format_main_stats(stats: dict) -> str:
     Returns:
         Formatted string ready to send to user
     """
-    text = "📊 <b>Статистика бота</b>\n\n"
-    text += f"👥 Всего пользователей: <b>{stats.get('total_users', 0)}</b>\n"
-    text += f"🆕 Новых за 24 часа: <b>{stats.get('new_users_24h', 0)}</b>\n"
-    text += f"🔁 Запусков сегодня: <b>{stats.get('restarts_today', 0)}</b>\n\n"
-    
-    text += "👣 <b>Переходы:</b>\n"
-    text += f"• В группу: {stats.get('group_visits', 0)}\n"
-    text += f"• К менеджеру: {stats.get('manager_contacts', 0)}\n\n"
-    
-    text += "💰 <b>Действия:</b>\n"
-    text += f"• Проверили стоимость ника: {stats.get('nickname_checks', 0)}\n"
-    text += f"• Начали оформление: {stats.get('checkout_starts', 0)}\n"
-    text += f"• Успешные заказы: {stats.get('successful_orders', 0)}\n"
-    text += f"• Брошенные оформления: {stats.get('abandoned_checkouts', 0)}"
-    
-    return text
+    return (
+        "📊 <b>Статистика бота</b>\n\n"
+        f"👥 Всего пользователей: <b>{stats.get('total_users', 0)}</b>\n"
+        f"🆕 Новых за 24 часа: <b>{stats.get('new_users_24h', 0)}</b>\n"
+        f"🔁 Запусков сегодня: <b>{stats.get('restarts_today', 0)}</b>\n\n"
+        "👣 <b>Переходы:</b>\n"
+        f"• В группу: {stats.get('group_visits', 0)}\n"
+        f"• К менеджеру: {stats.get('manager_contacts', 0)}\n\n"
+        "💰 <b>Действия:</b>\n"
+        f"• Проверили стоимость ника: {stats.get('nickname_checks', 0)}\n"
+        f"• Начали оформление: {stats.get('checkout_starts', 0)}\n"
+        f"• Успешные заказы: {stats.get('successful_orders', 0)}\n"
+        f"• Брошенные оформления: {stats.get('abandoned_checkouts', 0)}"
+    )
 
 
 def format_date_stats(stats: dict) -> str:
@@ -44,45 +60,60 @@ def format_date_stats(stats: dict) -> str:
         Formatted string
     """
     target_date = stats.get('date', date.today())
-    date_str = target_date.strftime("%d.%m.%Y")
+    date_str = target_date.strftime(_DATE_FORMAT)
     
-    text = f"📅 <b>Статистика за {date_str}</b>\n\n"
-    text += f"— Новые пользователи: <b>{stats.get('new_users', 0)}</b>\n"
-    text += f"— Проверок ника: {stats.get(EventType.CHECK_NICKNAME, 0)}\n"
-    text += f"— Переходов в группу: {stats.get(EventType.GO_TO_GROUP, 0)}\n"
-    text += f"— Переходов к менеджеру: {stats.get(EventType.CONTACT_MANAGER, 0)}\n"
-    text += f"— Оформлений: {stats.get(EventType.START_CHECKOUT, 0)}\n"
-    text += f"— Успешных покупок: {stats.get(EventType.SUCCESSFUL_ORDER, 0)}\n"
-    text += f"— Брошенных оформлений: {stats.get(EventType.ABANDONED_CHECKOUT, 0)}"
-    
-    return text
+    return (
+        f"📅 <b>Статистика за {date_str}</b>\n\n"
+        f"— Новые пользователи: <b>{stats.get('new_users', 0)}</b>\n"
+        f"— Проверок ника: {stats.get(EventType.CHECK_NICKNAME, 0)}\n"
+        f"— Переходов в группу: {stats.get(EventType.GO_TO_GROUP, 0)}\n"
+        f"— Переходов к менеджеру: {stats.get(EventType.CONTACT_MANAGER, 0)}\n"
+        f"— Оформлений: {stats.get(EventType.START_CHECKOUT, 0)}\n"
+        f"— Успешных покупок: {stats.get(EventType.SUCCESSFUL_ORDER, 0)}\n"
+        f"— Брошенных оформлений: {stats.get(EventType.ABANDONED_CHECKOUT, 0)}"
+    )
+
 
+def _delta(stats: dict, previous: Optional[dict], key: str) -> str:
+    """Change of a counter against the previous period, e.g. ' (+3)'; empty if unknown or unchanged."""
+    if previous is None:
+        return ""
+    diff = stats.get(key, 0) - previous.get(key, 0)
+    return f" ({diff:+d})" if diff else ""
 
-def format_period_stats(stats: dict) -> str:
+
+def format_period_stats(stats: dict, previous: Optional[dict] = None) -> str:
     """
     Format statistics for a date range.
     
     Args:
         stats: Dictionary with period statistics
+        previous: Statistics for the preceding period of the same length, shown as deltas
         
     Returns:
         Formatted string
     """
-    start_date = stats.get('start_date', date.today())
-    end_date = stats.get('end_date', date.today())
-    
-    start_str = start_date.strftime("%d.%m.%Y")
-    end_str = end_date.strftime("%d.%m.%Y")
-    
-    text = f"📊 <b>Статистика за период</b>\n"
-    text += f"<i>{start_str} — {end_str}</i>\n\n"
-    text += f"— Новые пользователи: <b>{stats.get('new_users', 0)}</b>\n"
-    text += f"— Проверок ника: {stats.get(EventType.CHECK_NICKNAME, 0)}\n"
-    text += f"— Переходов в группу: {stats.get(EventType.GO_TO_GROUP, 0)}\n"
-    text += f"— Переходов к менеджеру: {stats.get(EventType.CONTACT_MANAGER, 0)}\n"
-    text += f"— Оформлений: {stats.get(EventType.START_CHECKOUT, 0)}\n"
-    text += f"— Успешных покупок: {stats.get(EventType.SUCCESSFUL_ORDER, 0)}\n"
-    text += f"— Брошенных оформлений: {stats.get(EventType.ABANDONED_CHECKOUT, 0)}"
+    today = date.today()
+    start_date = stats.get('start_date', today)
+    end_date = stats.get('end_date', today)
+    
+    start_str = start_date.strftime(_DATE_FORMAT)
+    end_str = end_date.strftime(_DATE_FORMAT)
+    
+    text = (
+        f"📊 <b>Статистика за период</b>\n"
+        f"<i>{start_str} — {end_str}</i>\n\n"
+        f"— Новые пользователи: <b>{stats.get('new_users', 0)}</b>{_delta(stats, previous, 'new_users')}\n"
+        f"— Проверок ника: {stats.get(EventType.CHECK_NICKNAME, 0)}{_delta(stats, previous, EventType.CHECK_NICKNAME)}\n"
+        f"— Переходов в группу: {stats.get(EventType.GO_TO_GROUP, 0)}{_delta(stats, previous, EventType.GO_TO_GROUP)}\n"
+        f"— Переходов к менеджеру: {stats.get(EventType.CONTACT_MANAGER, 0)}{_delta(stats, previous, EventType.CONTACT_MANAGER)}\n"
+        f"— Оформлений: {stats.get(EventType.START_CHECKOUT, 0)}{_delta(stats, previous, EventType.START_CHECKOUT)}\n"
+        f"— Успешных покупок: {stats.get(EventType.SUCCESSFUL_ORDER, 0)}{_delta(stats, previous, EventType.SUCCESSFUL_ORDER)}\n"
+        f"— Брошенных оформлений: {stats.get(EventType.ABANDONED_CHECKOUT, 0)}{_delta(stats, previous, EventType.ABANDONED_CHECKOUT)}"
+    )
+    
+    if previous is not None:
+        text += "\n\n<i>В скобках — изменение к предыдущему периоду</i>"
     
     return text
 
@@ -100,25 +131,29 @@ def format_user_card(user_data: dict, language: str = "ru") -> str:
     """
     user_id = user_data.get('user_id', 0)
     username = user_data.get('username')
-    first_seen = user_data.get('first_seen', datetime.now())
-    last_activity = user_data.get('last_activity', datetime.now())
+    # Defaults are evaluated eagerly, so read the clock once
+    now = datetime.now()
+    first_seen = user_data.get('first_seen', now)
+    last_activity = user_data.get('last_activity', now)
     
-    user_display = f"@{username}" if username else f"ID {user_id}"
+    user_display = f"@{escape_html(username)}" if username else f"ID {user_id}"
     
-    text = f"👤 <b>Пользователь:</b> {user_display}\n"
-    text += f"🆔 <b>ID:</b> <code>{user_id}</code>\n"
-    text += f"📅 <b>Регистрация:</b> {first_seen.strftime('%d.%m.%Y %H:%M')}\n"
-    text += f"⏰ <b>Последняя активность:</b> {last_activity.strftime('%d.%m.%Y %H:%M')}\n"
-    text += f"🌍 <b>Язык:</b> {user_data.get('language', 'en').upper()}\n\n"
+    parts = [
+        f"👤 <b>Пользователь:</b> {user_display}\n"
+        f"🆔 <b>ID:</b> <code>{user_id}</code>\n"
+        f"📅 <b>Регистрация:</b> {first_seen.strftime(_DATETIME_FORMAT)}\n"
+        f"⏰ <b>Последняя активность:</b> {last_activity.strftime(_DATETIME_FORMAT)}\n"
+        f"🌍 <b>Язык:</b> {user_data.get('language', 'en').upper()}\n\n"
+    ]
     
     event_counts = user_data.get('event_counts', {})
     if event_counts:
-        text += "<b>📊 Статистика действий:</b>\n"
+        parts.append("<b>📊 Статистика действий:</b>\n")
         for event_type, count in event_counts.items():
-            emoji = EventType.get_emoji(event_type)
-            text += f"{emoji} {event_type}: {count}\n"
+            emoji = _EMOJI.get(event_type, _DEFAULT_EMOJI)
+            parts.append(f"{emoji} {event_type}: {count}\n")
     
-    return text
+    return "".join(parts)
 
 
 def format_user_history(events: list[dict]) -> str:
@@ -134,31 +169,33 @@ def format_user_history(events: list[dict]) -> str:
     if not events:
         return "История действий пуста"
     
-    text = "<b>История действий:</b>\n\n"
+    parts = ["<b>История действий:</b>\n\n"]
     
+    # Fallback timestamp for rows without one, read once rather than per row
+    now = datetime.now()
     for event in events[:20]:  # Show last 20 events
-        timestamp = event.get('timestamp', datetime.now())
-        time_str = timestamp.strftime('%H:%M')
+        timestamp = event.get('timestamp', now)
+        time_str = timestamp.strftime(_TIME_FORMAT)
         event_type = event.get('event_type', 'unknown')
-        emoji = EventType.get_emoji(event_type)
+        emoji = _EMOJI.get(event_type, _DEFAULT_EMOJI)
         
         metadata = event.get('metadata', {})
         extra_info = ""
         
         if event_type == EventType.CHECK_NICKNAME and 'nickname' in metadata:
-            extra_info = f" ({metadata['nickname']})"
+            extra_info = f" ({escape_html(metadata['nickname'])})"
         elif event_type == EventType.SUCCESSFUL_ORDER:
             if 'nickname' in metadata:
-                extra_info = f" ({metadata['nickname']})"
+                extra_info = f" ({escape_html(metadata['nickname'])})"
             if 'price' in metadata:
                 extra_info += f" ${metadata['price']:,}"
         
-        text += f"{emoji} {time_str} — {event_type}{extra_info}\n"
+        parts.append(f"{emoji} {time_str} — {event_type}{extra_info}\n")
     
     if len(events) > 20:
-        text += f"\n<i>... и ещё {len(events) - 20} событий</i>"
+        parts.append(f"\n<i>... и ещё {len(events) - 20} событий</i>")
     
-    return text
+    return "".join(parts)
 
 
 def format_users_list(users_data: dict) -> str:
@@ -176,29 +213,35 @@ def format_users_list(users_data: dict) -> str:
     total_pages = users_data.get('total_pages', 1)
     total_count = users_data.get('total_count', 0)
     
-    text = f"👥 <b>Список пользователей</b>\n"
-    text += f"<i>Страница {page} из {total_pages} (всего: {total_count})</i>\n\n"
+    header = (
+        f"👥 <b>Список пользователей</b>\n"
+        f"<i>Страница {page} из {total_pages} (всего: {total_count})</i>\n\n"
+    )
     
     if not users:
-        return text + "Пользователей не найдено"
+        return header + "Пользователей не найдено"
     
+    parts = [header]
+    now = datetime.now()
     for user in users:
         user_id = user.get('user_id', 0)
         username = user.get('username')
-        last_activity = user.get('last_activity', datetime.now())
+        last_activity = user.get('last_activity', now)
         total_events = user.get('total_events', 0)
         
         if username:
-            user_display = f"@{username}"
+            user_display = f"@{escape_html(username)}"
         else:
             user_display = f"ID {user_id}"
         
-        activity_str = last_activity.strftime('%d.%m %H:%M')
+        activity_str = last_activity.strftime(_SHORT_DATETIME_FORMAT)
         
-        text += f"• {user_display}\n"
-        text += f"  └ Активность: {activity_str} | События: {total_events}\n"
+        parts.append(
+            f"• {user_display}\n"
+            f"  └ Активность: {activity_str} | События: {total_events}\n"
+        )
     
-    return text
+    return "".join(parts)
 
 
 def format_event_type_stats(stats: dict, event_type: str) -> str:
@@ -212,11 +255,13 @@ def format_event_type_stats(stats: dict, event_type: str) -> str:
     Returns:
         Formatted string
     """
-    emoji = EventType.get_emoji(event_type)
+    emoji = _EMOJI.get(event_type, _DEFAULT_EMOJI)
     count = stats.get(event_type, 0)
     
-    text = f"{emoji} <b>Статистика: {event_type}</b>\n\n"
-    text += f"Всего событий: <b>{count}</b>\n"
+    text = (
+        f"{emoji} <b>Статистика: {event_type}</b>\n\n"
+        f"Всего событий: <b>{count}</b>\n"
+    )
     
     # Add context-specific information
     if event_type == EventType.SUCCESSFUL_ORDER:
@@ -0,0 +1,27 @@
+"""Rate limiting for outgoing Telegram messages."""
+import asyncio
+
+
+class SendLimiter:
+    """Paces message sends to a fixed rate shared by everyone holding the limiter."""
+    
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next_slot = 0.0
+    
+    async def wait(self) -> None:
+        """Wait for the next free send slot; returns at once while under the rate."""
+        now = asyncio.get_running_loop().time()
+        slot = max(self._next_slot, now)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+    
+    def pause(self, seconds: float) -> None:
+        """Hold back every send for at least the given time (Telegram flood control)."""
+        resume = asyncio.get_running_loop().time() + seconds
+        self._next_slot = max(self._next_slot, resume)
+
+
+# Shared by every bulk sender, since Telegram's flood limit (~30 msg/s) is per bot
+send_limiter = SendLimiter(25)